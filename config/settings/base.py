@@ -302,3 +302,49 @@ CORS_URLS_REGEX = r"^/api/.*$"
 # ------------------------------------------------------------------------------
 
 APPEND_SLASH = False
+
+# Lockers
+# ------------------------------------------------------------------------------
+# Whether QR codes encode a signed token (instead of a JSON object with the QR's uuid)
+LOCKERS_QR_SIGNED_TOKENS = env.bool("LOCKERS_QR_SIGNED_TOKENS", default=False)
+# Whether QR codes encode the uuid alone, in 26 characters of base32 (when not signed), for the smallest QR codes
+LOCKERS_QR_COMPACT_PAYLOADS = env.bool("LOCKERS_QR_COMPACT_PAYLOADS", default=False)
+# Seconds until a signed token expires
+LOCKERS_QR_TOKEN_MAX_AGE = env.int("LOCKERS_QR_TOKEN_MAX_AGE", default=60 * 60 * 24 * 30)
+# Whether the collection endpoint still accepts plain (unsigned) uuids
+LOCKERS_QR_ACCEPT_UNSIGNED = env.bool("LOCKERS_QR_ACCEPT_UNSIGNED", default=True)
+# Rendered QR codes kept in each process' memory
+LOCKERS_QR_RENDER_CACHE_SIZE = env.int("LOCKERS_QR_RENDER_CACHE_SIZE", default=256)
+# Whether deposits leave opening the locker to the drain_open_commands worker, instead of waiting for it
+LOCKERS_OPEN_COMMANDS_ASYNC = env.bool("LOCKERS_OPEN_COMMANDS_ASYNC", default=False)
+# Seconds to wait for a locker controller to accept a connection, and then to answer
+LOCKERS_HW_CONNECT_TIMEOUT = env.float("LOCKERS_HW_CONNECT_TIMEOUT", default=0.5)
+LOCKERS_HW_READ_TIMEOUT = env.float("LOCKERS_HW_READ_TIMEOUT", default=2.0)
+# Attempts per request to a locker controller, with exponential backoff (and jitter) between them
+LOCKERS_HW_RETRY_ATTEMPTS = env.int("LOCKERS_HW_RETRY_ATTEMPTS", default=4)
+LOCKERS_HW_RETRY_BASE_DELAY = env.float("LOCKERS_HW_RETRY_BASE_DELAY", default=0.1)
+LOCKERS_HW_RETRY_MAX_DELAY = env.float("LOCKERS_HW_RETRY_MAX_DELAY", default=1.0)
+# Failed attempts after which requests to a controller fail right away, and for how many seconds
+LOCKERS_HW_CIRCUIT_FAILURE_THRESHOLD = env.int(
+    "LOCKERS_HW_CIRCUIT_FAILURE_THRESHOLD", default=5
+)
+LOCKERS_HW_CIRCUIT_RESET_TIMEOUT = env.float(
+    "LOCKERS_HW_CIRCUIT_RESET_TIMEOUT", default=30.0
+)
+# Notifications sent over each connection to the mail server
+LOCKERS_NOTIFICATIONS_BATCH_SIZE = env.int("LOCKERS_NOTIFICATIONS_BATCH_SIZE", default=100)
+# Seconds a notification waits for more notifications of the same recipient, to be sent as a single email
+LOCKERS_NOTIFICATIONS_COALESCE_WINDOW = env.int(
+    "LOCKERS_NOTIFICATIONS_COALESCE_WINDOW", default=30
+)
+# Seconds without a heartbeat after which a controller is considered offline
+LOCKERS_CONTROLLER_HEARTBEAT_TIMEOUT = env.float(
+    "LOCKERS_CONTROLLER_HEARTBEAT_TIMEOUT", default=30.0
+)
+# The controller of lockers that aren't assigned to any controller
+LOCKERS_DEFAULT_CONTROLLER_URL = env(
+    "LOCKERS_DEFAULT_CONTROLLER_URL", default="http://192.168.43.212:80"
+)
+LOCKERS_DEFAULT_CONTROLLER_SUPPORTS_BATCHES = env.bool(
+    "LOCKERS_DEFAULT_CONTROLLER_SUPPORTS_BATCHES", default=False
+)
@@ -189,3 +189,5 @@ LOGGING = {
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Open lockers from the drain_open_commands worker (see Procfile), off the request path
+LOCKERS_OPEN_COMMANDS_ASYNC = env.bool("LOCKERS_OPEN_COMMANDS_ASYNC", default=True)
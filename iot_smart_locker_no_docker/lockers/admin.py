@@ -1,27 +1,47 @@
+import os
+import tempfile
 from gettext import ngettext
 
 from django.contrib import admin, messages
+from django.http import FileResponse
 
+from iot_smart_locker_no_docker.lockers import cache, labels, pool, utils
 from iot_smart_locker_no_docker.lockers.forms import (
     PersonalQRChangeForm,
     PersonalQRCreationForm,
     QRChangeForm,
     QRCreationForm,
 )
-from iot_smart_locker_no_docker.lockers.models import QR, Locker, PersonalQR
+from iot_smart_locker_no_docker.lockers.models import (
+    QR,
+    Controller,
+    Locker,
+    Notification,
+    OpenCommand,
+    PersonalQR,
+)
+
+
+@admin.register(Controller)
+class ControllerAdmin(admin.ModelAdmin):
+    list_display = ["name", "url", "supports_batches", "last_seen"]
 
 
 @admin.register(Locker)
 class LockerAdmin(admin.ModelAdmin):
-    actions = ["free_lockers"]
-    list_display = ["id", "occupied"]
+    actions = ["free_lockers", "open_lockers"]
+    list_display = ["id", "occupied", "controller", "door", "door_open"]
+    list_filter = ["controller", "occupied"]
 
     # @admin.action(description="Set selected lockers to 'unoccupied'")    # can only be used in django>=3.2
     def free_lockers(self, request, queryset):
         related_qrs = QR.objects.filter(locker__in=queryset)
+        cache.forget_qrs(related_qrs.values_list("uuid", flat=True))
         related_qrs.delete()
 
+        locker_ids = list(queryset.values_list("id", flat=True))
         updated_lockers_count: int = queryset.update(occupied=False)
+        pool.add(locker_ids)
         self.message_user(
             request,
             ngettext(
@@ -37,18 +57,105 @@ class LockerAdmin(admin.ModelAdmin):
         "Set selected lockers to 'unoccupied'"  # instead of @admin.action(...)
     )
 
+    def open_lockers(self, request, queryset):
+        results = utils.request_to_open_lockers(queryset)
+        failed = [locker_id for locker_id, success in results.items() if not success]
+        if failed:
+            self.message_user(
+                request, f"Failed to open lockers {failed}", messages.WARNING
+            )
+        else:
+            self.message_user(
+                request,
+                ngettext(
+                    "%d locker was opened.", "%d lockers were opened.", len(results)
+                )
+                % len(results),
+                messages.SUCCESS,
+            )
+
+    open_lockers.short_description = "Open selected lockers"
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.occupied:
+            pool.remove([obj.id])
+        else:
+            pool.add([obj.id])
+
+
+@admin.register(OpenCommand)
+class OpenCommandAdmin(admin.ModelAdmin):
+    list_display = ["id", "locker", "status", "attempts", "created", "sent", "opened"]
+    list_filter = ["status"]
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ["id", "email", "status", "attempts", "created", "sent"]
+    list_filter = ["status"]
+    search_fields = ["email", "qr_uuid"]
+
+
+# more labels than this are left to the render_qr_labels command, rather than rendered by a web request
+ADMIN_LABELS_LIMIT = 2 * labels.LABELS_PER_PAGE
+
+
+def print_labels(modeladmin, request, queryset):
+    if queryset.count() > ADMIN_LABELS_LIMIT:
+        waiting: str = " --waiting" if queryset.model is QR else ""
+        user_ids: str = " ".join(
+            str(user_id)
+            for user_id in queryset.values_list("recipient_id", flat=True)
+            .order_by("recipient_id")
+            .distinct()
+        )
+        modeladmin.message_user(
+            request,
+            f"Too many labels to render here (at most {ADMIN_LABELS_LIMIT}), run instead: "
+            f"python manage.py render_qr_labels labels.pdf{waiting} --users {user_ids}",
+            messages.WARNING,
+        )
+        return None
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as sheet:
+        path = sheet.name
+    try:
+        labels.write_sheet(queryset, path, workers=0)
+        response = FileResponse(
+            open(path, "rb"), as_attachment=True, filename="qr-labels.pdf"
+        )
+    finally:
+        os.remove(path)  # the response keeps the open file
+    return response
+
+
+print_labels.short_description = (
+    f"Download printable labels of the selected QRs (up to {ADMIN_LABELS_LIMIT})"
+)
+
 
 @admin.register(QR)
 class QRAdmin(admin.ModelAdmin):
+    actions = [print_labels]
     form = QRChangeForm
     add_form = QRCreationForm
     readonly_fields = ["uuid"]
     list_display = ["recipient", "locker", "uuid"]
 
+    def delete_queryset(self, request, queryset):
+        cache.forget_qrs(queryset.values_list("uuid", flat=True))
+        super().delete_queryset(request, queryset)
+
 
 @admin.register(PersonalQR)
 class PersonalQRAdmin(admin.ModelAdmin):
+    actions = [print_labels]
     form = PersonalQRChangeForm
     add_form = PersonalQRCreationForm
     readonly_fields = ["uuid"]
     list_display = ["recipient", "uuid"]
+
+    def delete_queryset(self, request, queryset):
+        cache.forget_personal_qrs(queryset.values_list("uuid", flat=True))
+        super().delete_queryset(request, queryset)
@@ -0,0 +1,72 @@
+"""Responses of the collection endpoints, as read by the ESP32 firmware.
+
+The firmware picks the protocol version with the ``X-Locker-Protocol`` header
+(or a ``protocol`` query parameter, for firmware that can't set headers):
+
+* Version 1 (legacy, the default) - the status code is ``200 + locker id``.
+  It only fits a few hundred lockers, and opens a single door per response,
+  so a tap or scan only collects a single package.
+* Version 2 (compact) - the status code is 200, and the plain-text body is
+  a ``v2`` line followed by a ``<locker id> <controller id> <door index>`` line per locker to open.
+
+Errors are reported with status code 500 in all versions.
+"""
+
+from typing import List, Optional, Tuple
+
+from django.http import HttpResponse
+
+from iot_smart_locker_no_docker.lockers import routing
+
+LEGACY = 1
+COMPACT = 2
+SUPPORTED_VERSIONS = (LEGACY, COMPACT)
+
+HEADER = "X-Locker-Protocol"
+QUERY_PARAM = "protocol"
+
+
+def get_version(request) -> int:
+    requested: str = request.headers.get(HEADER) or request.GET.get(QUERY_PARAM, "")
+    try:
+        version = int(requested)
+    except ValueError:
+        return LEGACY
+    return version if version in SUPPORTED_VERSIONS else LEGACY
+
+
+def max_lockers_per_response(request) -> Optional[int]:
+    """How many lockers a response can open (None for no limit) - consume no more QRs than that,
+    or their lockers would be freed without their doors being opened."""
+    return None if get_version(request) == COMPACT else 1
+
+
+def open_lockers_response(request, locker_ids: List[int]) -> HttpResponse:
+    if get_version(request) == COMPACT:
+        lines: List[str] = [f"v{COMPACT}"]
+        for locker_id in locker_ids:
+            controller_id, door = get_door_address(locker_id)
+            lines.append(f"{locker_id} {controller_id} {door}")
+        return HttpResponse(
+            "\n".join(lines) + "\n", content_type="text/plain", status=200
+        )
+
+    # this is our own convention, which the ESP32CAM needs to know how to read
+    response_code: int = 200 + locker_ids[0]
+    # all of the lockers to open, for controllers that handle more than one locker per response
+    return HttpResponse(
+        ",".join(str(locker_id) for locker_id in locker_ids),
+        content_type="text/plain",
+        status=response_code,
+    )
+
+
+def error_response() -> HttpResponse:
+    return HttpResponse(status=500)
+
+
+def get_door_address(locker_id: int) -> Tuple[int, int]:
+    """Returns the (controller id, door index) of the locker.
+    Lockers of the default controller are reported as controller 0."""
+    route: routing.Route = routing.table.get(locker_id)
+    return route.controller_id, route.door
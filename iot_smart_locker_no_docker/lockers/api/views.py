@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime
+from typing import List, Optional
 
 from django.contrib import messages
 from django.http import HttpResponse
@@ -12,8 +13,9 @@ from rest_framework.decorators import (
 )
 from rest_framework.renderers import JSONRenderer, TemplateHTMLRenderer
 
-from .. import utils
-from ..models import QR, Locker, User
+from .. import cache, doors, liveness, telemetry, tokens, utils
+from ..models import Locker, User
+from . import protocol
 
 logger = logging.getLogger("django")
 
@@ -37,88 +39,158 @@ def open_single_locker_with_qr(request, uuid: str):
     )
     logger.info(f"UUID: {uuid}")
 
+    qr_uuid: str = tokens.read_uuid(uuid)
+    if qr_uuid is None:
+        logger.warning(
+            f"Rejected invalid or expired code {uuid}, returning error code 500"
+        )
+        return protocol.error_response()
+
     try:
-        qr: QR = _find_qr(uuid)
-        if qr is None:
+        locker_id: int = utils.consume_qr(qr_uuid)
+        if locker_id is None:
             logger.warning(
                 f"No QR in database for UUID {uuid}, returning error code 500"
             )
-            return HttpResponse(status=500)
-
-        locker: Locker = qr.locker
-        logger.info(f"Found relevant locker: #{locker.id}")
+            return protocol.error_response()
 
-        response_code: int = (
-            200 + locker.id
-        )  # this is our own convention, which the ESP32CAM needs to know how to read
-        _cleanup(qr)
+        logger.info(f"Found relevant locker: #{locker_id}")
 
     except Exception as e:
         logger.exception(e)
-        return HttpResponse(status=500)
+        return protocol.error_response()
 
-    return HttpResponse(status=response_code)
+    return protocol.open_lockers_response(request, [locker_id])
 
 
 @api_view(("GET",))
 @authentication_classes([])
 @permission_classes([])  # TODO add "AllowAny"?
 @renderer_classes((TemplateHTMLRenderer, JSONRenderer))
-def open_single_locker_with_nfc(request, serial: str):
+def open_lockers_with_nfc(request, serial: str):
+    """Opens all of the lockers waiting for the user with a single tap
+    (one locker per tap with the legacy protocol)"""
     # TODO add frontend-access for this view?
 
     logger.info("")
     logger.info(
-        f"=== open_single_locker_with_nfc [{datetime.now().strftime('%d/%m/%Y %H:%M:%S')}] ==="
+        f"=== open_lockers_with_nfc [{datetime.now().strftime('%d/%m/%Y %H:%M:%S')}] ==="
     )
     logger.info(f"Serial: {serial}")
 
     try:
-        user: User = _find_user(serial)
-        if user is None:
+        user_id: int = _find_user_id(serial)
+        if user_id is None:
             logger.warning(
                 f"No user in database with NFC serial {serial}, returning error code 500"
             )
-            return HttpResponse(status=500)
+            return protocol.error_response()
 
-        locker: Locker = _find_locker(user)
-        if locker is None:
+        locker_ids: List[int] = utils.consume_qrs_of(
+            user_id, limit=protocol.max_lockers_per_response(request)
+        )
+        if not locker_ids:
             logger.warning(
-                f"No locker in database waiting for user {user.username}, returning error code 500"
+                f"No locker in database waiting for user #{user_id}, returning error code 500"
             )
-            return HttpResponse(status=500)
-        logger.info(f"Found relevant locker: #{locker.id}")
-
-        response_code: int = (
-            200 + locker.id
-        )  # this is our own convention, which the ESP32CAM needs to know how to read
-        _cleanup_by_user(user)
+            return protocol.error_response()
+        logger.info(f"Found relevant lockers: {locker_ids}")
 
     except Exception as e:
         logger.exception(e)
-        return HttpResponse(status=500)
+        return protocol.error_response()
 
-    return HttpResponse(status=response_code)
+    return protocol.open_lockers_response(request, locker_ids)
 
 
-def show_connection_error_page(request):
-    logger.warning("Redirecting user to the connection error page :(")
-    return render(request, "500.html")
+@api_view(("GET", "POST"))
+@authentication_classes([])
+@permission_classes([])
+def controller_heartbeat(request, controller_id: int):
+    """Called by the controllers every few seconds, so deposits skip the lockers of controllers that stop"""
+    if not liveness.record_heartbeat(controller_id):
+        logger.warning(f"Heartbeat from unknown controller #{controller_id}")
+        return HttpResponse(status=404)
+    return HttpResponse("OK", content_type="text/plain")
 
 
-def _find_user(nfc_serial: str) -> User:
-    return User.objects.get(nfc_serial=nfc_serial)
+@api_view(("POST",))
+@authentication_classes([])
+@permission_classes([])
+def report_door_events(request, controller_id: int):
+    """Queues the controller's ``<door> opened|closed`` lines, which are applied in the background"""
+    body: str = request.body.decode(errors="replace")
+    queued: int = doors.record_events(controller_id, doors.parse_events(body))
+    return HttpResponse(str(queued), status=202, content_type="text/plain")
 
 
-def _find_qr(qr_uuid: str) -> QR:
-    return QR.objects.get(uuid=qr_uuid)
+@api_view(("POST",))
+@authentication_classes([])
+@permission_classes([])
+def report_telemetry(request, controller_id: int):
+    """Records a batch of the controller's sensor readings, one per line"""
+    body: str = request.body.decode(errors="replace")
+    recorded: int = telemetry.record_readings(
+        controller_id, telemetry.parse_readings(body)
+    )
+    return HttpResponse(str(recorded), status=202, content_type="text/plain")
+
 
+@api_view(("GET",))
+@authentication_classes([])
+@permission_classes([])  # TODO add "AllowAny"?
+@renderer_classes((TemplateHTMLRenderer, JSONRenderer))
+def open_lockers_with_personal_qr(request, uuid: str):
+    """Opens all of the lockers waiting for the owner of the personal QR with a single scan
+    (one locker per scan with the legacy protocol)"""
 
-def _find_locker(user: User) -> Locker:
-    qr: QR = QR.objects.get(recipient=user)
-    if qr is None:
-        return None
-    return qr.locker
+    logger.info("")
+    logger.info(
+        f"=== open_lockers_with_personal_qr [{datetime.now().strftime('%d/%m/%Y %H:%M:%S')}] ==="
+    )
+    logger.info(f"UUID: {uuid}")
+
+    personal_qr_uuid: str = tokens.read_uuid(uuid, expires=False)
+    if personal_qr_uuid is None:
+        logger.warning(
+            f"Rejected invalid or expired code {uuid}, returning error code 500"
+        )
+        return protocol.error_response()
+
+    try:
+        locker_ids: List[int] = utils.consume_qrs_of_personal_qr(
+            personal_qr_uuid, limit=protocol.max_lockers_per_response(request)
+        )
+        if not locker_ids:
+            logger.warning(
+                f"No locker in database waiting for personal QR {uuid}, returning error code 500"
+            )
+            return protocol.error_response()
+        logger.info(f"Found relevant lockers: {locker_ids}")
+
+    except Exception as e:
+        logger.exception(e)
+        return protocol.error_response()
+
+    return protocol.open_lockers_response(request, locker_ids)
+
+
+def show_connection_error_page(request):
+    logger.warning("Redirecting user to the connection error page :(")
+    return render(request, "500.html")
+
+
+def _find_user_id(nfc_serial: str) -> Optional[int]:
+    user_id: int = cache.get_nfc_user_id(nfc_serial)
+    if user_id is None:
+        user_id = (
+            User.objects.filter(nfc_serial=nfc_serial)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if user_id is not None:
+            cache.set_nfc_user_id(nfc_serial, user_id)
+    return user_id
 
 
 def _open_locker(locker_with_package: Locker) -> bool:
@@ -133,13 +205,3 @@ def _handle_response(request, locker: Locker, success: bool) -> int:
     response: str = MessageTexts.FAILED_OPEN_LOCKER.format(locker.id)
     messages.warning(request, response)
     return 500
-
-
-def _cleanup_by_user(user: User) -> None:
-    qr: QR = QR.objects.get(recipient=user)
-    _cleanup(qr)
-
-
-def _cleanup(consumed_qr: QR) -> None:
-    utils.free_locker(consumed_qr.locker)
-    consumed_qr.delete()
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class LockersConfig(AppConfig):
     name = "iot_smart_locker_no_docker.lockers"
+
+    def ready(self):
+        try:
+            import iot_smart_locker_no_docker.lockers.signals  # noqa F401
+        except ImportError:
+            pass
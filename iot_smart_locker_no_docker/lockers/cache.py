@@ -0,0 +1,63 @@
+"""Cached lookups for the collection endpoints.
+
+Uses the default cache, which is Redis in production and in-process memory in development.
+Entries are written when the underlying rows are saved and invalidated when they are consumed,
+so a cache miss only means falling back to the database.
+"""
+
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+
+from iot_smart_locker_no_docker.lockers import rendering
+
+TIMEOUT = (
+    60 * 60 * 24 * 30
+)  # 30 days, as a safety net for entries that missed invalidation
+
+
+def forget_qrs(qr_uuids: Iterable[str]) -> None:
+    """Forgets the QRs' rendered images"""
+    rendering.forget(list(qr_uuids))
+
+
+def _nfc_user_key(nfc_serial: str) -> str:
+    return f"lockers:nfc:{nfc_serial}:user"
+
+
+def get_nfc_user_id(nfc_serial: str) -> Optional[int]:
+    return cache.get(_nfc_user_key(nfc_serial))
+
+
+def set_nfc_user_id(nfc_serial: str, user_id: int) -> None:
+    cache.set(_nfc_user_key(nfc_serial), user_id, TIMEOUT)
+
+
+def forget_nfc_serials(nfc_serials: Iterable[str]) -> None:
+    cache.delete_many(
+        [_nfc_user_key(nfc_serial) for nfc_serial in nfc_serials if nfc_serial]
+    )
+
+
+def _personal_qr_user_key(personal_qr_uuid: str) -> str:
+    return f"lockers:personal_qr:{personal_qr_uuid}:user"
+
+
+def get_personal_qr_user_id(personal_qr_uuid: str) -> Optional[int]:
+    return cache.get(_personal_qr_user_key(personal_qr_uuid))
+
+
+def set_personal_qr_user_id(personal_qr_uuid: str, user_id: int) -> None:
+    cache.set(_personal_qr_user_key(personal_qr_uuid), user_id, TIMEOUT)
+
+
+def forget_personal_qrs(personal_qr_uuids: Iterable[str]) -> None:
+    """Forgets the personal QRs' owners, and their rendered images"""
+    personal_qr_uuids = list(personal_qr_uuids)
+    cache.delete_many(
+        [
+            _personal_qr_user_key(personal_qr_uuid)
+            for personal_qr_uuid in personal_qr_uuids
+        ]
+    )
+    rendering.forget(personal_qr_uuids)
@@ -0,0 +1,65 @@
+"""Circuit breakers for the locker controllers.
+
+The breaker's state lives in the shared cache, so all worker processes agree on it:
+
+* Closed - requests go through. Consecutive failures are counted.
+* Open - after ``failure_threshold`` consecutive failures requests fail right away,
+  for ``reset_timeout`` seconds.
+* Half-open - once the timeout passes, a single request (across all workers) is let through
+  as a probe. Its success closes the breaker, its failure opens it again.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+TRIPPED_TIMEOUT = (
+    60 * 60 * 24
+)  # how long a breaker is remembered as tripped, without probes
+
+
+class CircuitBreaker:
+    def __init__(
+        self, name: str, failure_threshold: int = None, reset_timeout: float = None
+    ):
+        self.name = name
+        self.failure_threshold: int = (
+            failure_threshold or settings.LOCKERS_HW_CIRCUIT_FAILURE_THRESHOLD
+        )
+        self.reset_timeout: float = (
+            reset_timeout or settings.LOCKERS_HW_CIRCUIT_RESET_TIMEOUT
+        )
+
+        prefix = f"lockers:circuit:{name}"
+        self._failures_key = f"{prefix}:failures"
+        self._open_key = f"{prefix}:open"
+        self._tripped_key = f"{prefix}:tripped"
+        self._probe_key = f"{prefix}:probe"
+
+    def allow_request(self) -> bool:
+        state = cache.get_many([self._open_key, self._tripped_key])
+        if self._open_key in state:
+            return False
+        if self._tripped_key in state:  # half-open, let a single probe through
+            return cache.add(self._probe_key, True, self.reset_timeout)
+        return True
+
+    def record_success(self) -> None:
+        cache.delete_many([self._failures_key, self._tripped_key, self._probe_key])
+
+    def record_failure(self) -> None:
+        cache.add(self._failures_key, 0, self.reset_timeout)
+        try:
+            failures: int = cache.incr(self._failures_key)
+        except ValueError:  # expired in between
+            failures = 1
+        tripped: bool = cache.get(self._tripped_key) is not None
+        if tripped or failures >= self.failure_threshold:
+            self._open()
+
+    def is_open(self) -> bool:
+        return cache.get(self._open_key) is not None
+
+    def _open(self) -> None:
+        cache.set(self._tripped_key, True, TRIPPED_TIMEOUT)
+        cache.set(self._open_key, True, self.reset_timeout)
+        cache.delete_many([self._failures_key, self._probe_key])
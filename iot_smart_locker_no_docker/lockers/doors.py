@@ -0,0 +1,113 @@
+"""Door sensor reports from the locker controllers.
+
+Controllers report their doors opening and closing with a ``<door> opened`` or ``<door> closed`` line
+per event. The endpoint only queues the events (DoorEvent), so controllers aren't kept waiting,
+and the apply_door_events worker applies them to the lockers' door state
+and acknowledges the open commands they answer.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+
+from iot_smart_locker_no_docker.lockers import routing
+from iot_smart_locker_no_docker.lockers.models import DoorEvent, Locker, OpenCommand
+
+logger = logging.getLogger("django")
+
+
+def parse_events(body: str) -> List[Tuple[int, str]]:
+    """Returns the (door, state) of each event, skipping malformed lines"""
+    events: List[Tuple[int, str]] = []
+    for line in body.splitlines():
+        try:
+            door, state = line.split()
+            events.append((int(door), DoorEvent.State(state)))
+        except ValueError:
+            logger.warning(f"Unexpected line in the controller's door events: {line!r}")
+    return events
+
+
+def record_events(controller_id: int, events: List[Tuple[int, str]]) -> int:
+    """Queues the events of the controller's doors. Returns the number of events queued."""
+    locker_ids: Dict[int, int] = find_lockers(
+        controller_id, {door for door, _ in events}
+    )
+    queued: List[DoorEvent] = DoorEvent.objects.bulk_create(
+        DoorEvent(locker_id=locker_ids[door], state=state)
+        for door, state in events
+        if door in locker_ids
+    )
+    if len(queued) < len(events):
+        logger.warning(f"Door events for unknown doors of controller #{controller_id}")
+    return len(queued)
+
+
+def apply_events(batch_size: int) -> int:
+    """Applies a batch of queued events, oldest first. Returns the number of events applied."""
+    with transaction.atomic():
+        events: List[DoorEvent] = list(
+            DoorEvent.objects.select_for_update(skip_locked=True).order_by("id")[
+                :batch_size
+            ]
+        )
+        if not events:
+            return 0
+
+        latest: Dict[int, DoorEvent] = {event.locker_id: event for event in events}
+        for state in DoorEvent.State:
+            changed: Dict[int, datetime] = {
+                locker_id: event.created
+                for locker_id, event in latest.items()
+                if event.state == state
+            }
+            if changed:
+                Locker.objects.filter(id__in=changed).update(
+                    door_open=state == DoorEvent.State.OPENED,
+                    door_changed=_per_locker(changed, "id"),
+                )
+
+        first_opened: Dict[int, datetime] = {}
+        for event in events:
+            if event.state == DoorEvent.State.OPENED:
+                first_opened.setdefault(event.locker_id, event.created)
+        if first_opened:
+            OpenCommand.objects.filter(
+                locker_id__in=first_opened,
+                status=OpenCommand.Status.SENT,
+                opened__isnull=True,
+            ).update(opened=_per_locker(first_opened, "locker_id"))
+
+        DoorEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    return len(events)
+
+
+def find_lockers(controller_id: int, doors: Iterable[int]) -> Dict[int, int]:
+    """Maps the controller's doors to their lockers' ids"""
+    if controller_id == routing.DEFAULT_CONTROLLER_ID:  # doors are the lockers' ids
+        return {
+            locker_id: locker_id
+            for locker_id in Locker.objects.filter(
+                id__in=doors, controller__isnull=True
+            ).values_list("id", flat=True)
+        }
+    found: Dict[int, int] = {
+        door: routing.table.find_locker(controller_id, door) for door in doors
+    }
+    return {
+        door: locker_id for door, locker_id in found.items() if locker_id is not None
+    }
+
+
+def _per_locker(values: Dict[int, datetime], field: str) -> Case:
+    """Sets each locker's own value in a single UPDATE"""
+    return Case(
+        *(
+            When(**{field: locker_id}, then=Value(value))
+            for locker_id, value in values.items()
+        ),
+        output_field=DateTimeField(),
+    )
@@ -0,0 +1,98 @@
+"""HTTP client for the locker controllers (ESP32).
+
+Keeps a persistent, keep-alive session per controller, so opening a locker doesn't pay
+for a new TCP connection every time, and enforces connect/read timeouts,
+so a controller that hangs can't pin a web worker.
+"""
+
+import logging
+import threading
+from time import monotonic
+from typing import Dict, List
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger("django")
+
+
+class HardwareClient:
+    def __init__(self, connect_timeout: float, read_timeout: float):
+        self.timeout = (connect_timeout, read_timeout)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def post(self, url: str, data: str, headers: Dict) -> requests.Response:
+        """Raises requests.RequestException (e.g. requests.Timeout) on failure"""
+        session: requests.Session = self._get_session(url)
+        start: float = monotonic()
+        try:
+            response: requests.Response = session.post(
+                url, data, headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException:
+            logger.warning(
+                f"Controller {url} failed after {self._elapsed_ms(start):.0f}ms"
+            )
+            raise
+        logger.info(
+            f"Controller {url} answered {response.status_code} in {self._elapsed_ms(start):.0f}ms"
+        )
+        return response
+
+    def open_doors(self, url: str, doors: List[int]) -> Dict[int, bool]:
+        """Opens several doors of the controller in a single request, with a ``prefix_<door>,<door>,...`` body.
+        The controller answers with an ``<door> ok`` (or ``<door> error``) line per door.
+        Only send several doors to controllers that support batches (Controller.supports_batches).
+        Returns whether each door was opened. Raises requests.RequestException on failure.
+        """
+        response: requests.Response = self.post(
+            url,
+            "prefix_" + ",".join(str(door) for door in doors),
+            headers={"content-type": "text/plain"},
+        )
+        if response.status_code != 200:
+            logger.warning("Something failed in communications with HW")
+            logger.warning(response.__repr__())
+            response.raise_for_status()
+        return parse_door_results(response.text, doors)
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _get_session(self, url: str) -> requests.Session:
+        with self._lock:
+            session: requests.Session = self._sessions.get(url)
+            if session is None:
+                session = self._sessions[url] = requests.Session()
+            return session
+
+    @staticmethod
+    def _elapsed_ms(start: float) -> float:
+        return (monotonic() - start) * 1000
+
+
+def parse_door_results(body: str, doors: List[int]) -> Dict[int, bool]:
+    """An empty body (from firmware that predates batches) only counts as success
+    when a single door was requested"""
+    if not body.strip():
+        return {door: len(doors) == 1 for door in doors}
+
+    results: Dict[int, bool] = {door: False for door in doors}
+    for line in body.splitlines():
+        try:
+            door, status = line.split()
+            results[int(door)] = status == "ok"
+        except ValueError:
+            logger.warning(f"Unexpected line in the controller's response: {line!r}")
+    return results
+
+
+# one client (and set of connections) per worker process
+client = HardwareClient(
+    connect_timeout=settings.LOCKERS_HW_CONNECT_TIMEOUT,
+    read_timeout=settings.LOCKERS_HW_READ_TIMEOUT,
+)
@@ -0,0 +1,98 @@
+"""Printable sheets of QR code labels, e.g. PersonalQR cards for all users.
+
+Labels are rendered in a pool of processes (or in this one, for a few labels) and laid out on A4 pages.
+Pages are appended to the PDF one at a time, and rows are read in chunks,
+so memory stays flat however many labels there are.
+"""
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import segno
+from django.db.models import QuerySet
+from PIL import Image, ImageDraw
+
+from iot_smart_locker_no_docker.lockers.models import QR, BaseQR
+
+DPI = 150
+PAGE_SIZE = (1240, 1754)  # A4 at 150 dpi
+COLUMNS, ROWS = 3, 5
+LABEL_SIZE = (PAGE_SIZE[0] // COLUMNS, PAGE_SIZE[1] // ROWS)
+LABELS_PER_PAGE = COLUMNS * ROWS
+CAPTION_HEIGHT = 30
+
+Label = Tuple[str, str]  # (payload, caption)
+
+
+def write_sheet(
+    queryset: QuerySet, path: str, workers: Optional[int] = None, chunk_size: int = 500
+) -> int:
+    """Writes a label for each of the queryset's QRs (or PersonalQRs) to a PDF. Returns the number of labels.
+    With 0 workers, labels are rendered in this process."""
+    # whole pages per chunk
+    chunk_size = max(LABELS_PER_PAGE, chunk_size - chunk_size % LABELS_PER_PAGE)
+    queryset = queryset.select_related("recipient").order_by("id")
+    labels: Iterator[Label] = (
+        (qr.get_payload(), _caption(qr)) for qr in queryset.iterator(chunk_size)
+    )
+
+    count = 0
+    with (
+        ProcessPoolExecutor(max_workers=workers) if workers != 0 else nullcontext()
+    ) as executor:
+        while True:
+            chunk: List[Label] = list(islice(labels, chunk_size))
+            if not chunk:
+                break
+            images: Iterator[bytes] = (
+                executor.map(render_label, chunk, chunksize=LABELS_PER_PAGE)
+                if executor
+                else map(render_label, chunk)
+            )
+            for start in range(0, len(chunk), LABELS_PER_PAGE):
+                page: Image.Image = _layout(islice(images, LABELS_PER_PAGE))
+                page.save(path, "PDF", resolution=DPI, append=count > 0)
+                count += min(LABELS_PER_PAGE, len(chunk) - start)
+    if not count:  # an empty sheet, rather than no file
+        Image.new("RGB", PAGE_SIZE, "white").save(path, "PDF", resolution=DPI)
+    return count
+
+
+def render_label(label: Label) -> bytes:
+    """Runs in the worker processes, so only gets (and returns) plain data"""
+    payload, caption = label
+    code = segno.make(payload, micro=False)
+    available: int = min(LABEL_SIZE[0], LABEL_SIZE[1] - CAPTION_HEIGHT) - 20
+    scale: int = max(1, available // code.symbol_size(scale=1, border=2)[0])
+    buffer = io.BytesIO()
+    code.save(buffer, kind="png", scale=scale, border=2)
+    image_of_code: Image.Image = Image.open(buffer).convert("L")
+    size: int = image_of_code.size[0]
+
+    image: Image.Image = Image.new("L", LABEL_SIZE, "white")
+    image.paste(image_of_code, ((LABEL_SIZE[0] - size) // 2, 10))
+    ImageDraw.Draw(image).text((20, size + 15), caption, fill="black")
+
+    output = io.BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+def _layout(images: Iterable[bytes]) -> Image.Image:
+    page: Image.Image = Image.new("RGB", PAGE_SIZE, "white")
+    for i, image in enumerate(images):
+        row, column = divmod(i, COLUMNS)
+        page.paste(
+            Image.open(io.BytesIO(image)),
+            (column * LABEL_SIZE[0], row * LABEL_SIZE[1]),
+        )
+    return page
+
+
+def _caption(qr: BaseQR) -> str:
+    if isinstance(qr, QR):
+        return f"{qr.recipient.username} - locker #{qr.locker_id}"
+    return qr.recipient.username
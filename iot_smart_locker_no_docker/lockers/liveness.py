@@ -0,0 +1,83 @@
+"""Liveness of the locker controllers, tracked from their heartbeats.
+
+The time of a controller's last heartbeat is kept in the shared cache, and written through to
+Controller.last_seen at most twice per timeout, which is where it's read from if the cache lost it.
+A controller is offline once its last heartbeat is older than settings.LOCKERS_CONTROLLER_HEARTBEAT_TIMEOUT.
+Controllers that never sent a heartbeat (e.g. firmware without heartbeats) are always considered online.
+"""
+
+from time import time
+from typing import Dict, Iterable, List, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers.cache import TIMEOUT
+from iot_smart_locker_no_docker.lockers.models import Controller
+
+NEVER = 0.0  # last heartbeat of controllers that never sent one
+
+
+def _last_seen_key(controller_id: int) -> str:
+    return f"lockers:controller:{controller_id}:seen"
+
+
+def record_heartbeat(controller_id: int) -> bool:
+    """Returns False if there's no such controller"""
+    now: float = time()
+    previous: float = cache.get(_last_seen_key(controller_id))
+    if (
+        previous is None
+        or now - previous > settings.LOCKERS_CONTROLLER_HEARTBEAT_TIMEOUT / 2
+    ):
+        if not Controller.objects.filter(id=controller_id).update(
+            last_seen=timezone.now()
+        ):
+            return False
+    cache.set(_last_seen_key(controller_id), now, TIMEOUT)
+    return True
+
+
+def is_online(controller_id: int) -> bool:
+    return not offline_controller_ids([controller_id])
+
+
+def offline_controller_ids(controller_ids: Iterable[int]) -> Set[int]:
+    keys: Dict[str, int] = {
+        _last_seen_key(controller_id): controller_id for controller_id in controller_ids
+    }
+    last_seen: Dict[int, float] = {
+        keys[key]: seen for key, seen in cache.get_many(list(keys)).items()
+    }
+    missing: List[int] = [
+        controller_id
+        for controller_id in keys.values()
+        if controller_id not in last_seen
+    ]
+    if missing:
+        last_seen.update(_load(missing))
+
+    deadline: float = time() - settings.LOCKERS_CONTROLLER_HEARTBEAT_TIMEOUT
+    return {
+        controller_id
+        for controller_id, seen in last_seen.items()
+        if seen != NEVER and seen < deadline
+    }
+
+
+def _load(controller_ids: List[int]) -> Dict[int, float]:
+    """Falls back to the database, and caches what it finds"""
+    rows = dict(
+        Controller.objects.filter(id__in=controller_ids).values_list("id", "last_seen")
+    )
+    last_seen: Dict[int, float] = {
+        controller_id: (
+            rows[controller_id].timestamp() if rows.get(controller_id) else NEVER
+        )
+        for controller_id in controller_ids
+    }
+    for controller_id, seen in last_seen.items():
+        # don't overwrite a heartbeat that arrived in the meantime
+        cache.add(_last_seen_key(controller_id), seen, TIMEOUT)
+    return last_seen
@@ -0,0 +1,32 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from iot_smart_locker_no_docker.lockers import doors
+
+
+class Command(BaseCommand):
+    help = (
+        "Applies the door events reported by the locker controllers to the lockers. "
+        "Run a single worker, so events are applied in order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=0.5,
+            help="Seconds to wait when there are no queued events",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Apply a single batch and exit"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            applied: int = doors.apply_events(options["batch_size"])
+            if options["once"]:
+                return
+            if not applied:
+                sleep(options["poll_interval"])
@@ -0,0 +1,41 @@
+import uuid
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import segno
+from django.core.management.base import BaseCommand
+
+from iot_smart_locker_no_docker.lockers.models import QR
+
+
+class Command(BaseCommand):
+    help = "Compares the QR code size and encoding time of each payload kind"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count: int = options["count"]
+        qrs: List[QR] = [
+            QR(uuid=uuid.uuid4().hex, recipient_id=1234, locker_id=567)
+            for _ in range(count)
+        ]
+        kinds: Dict[str, Callable[[QR], str]] = {
+            "json": QR.to_json,
+            "token": QR.to_token,
+            "compact": QR.to_compact,
+        }
+
+        self.stdout.write(
+            f"{'payload':<10}{'chars':>8}{'mode':>14}{'version':>9}{'modules':>9}{'ms/code':>9}"
+        )
+        for kind, make_payload in kinds.items():
+            payloads: List[str] = [make_payload(qr) for qr in qrs]
+            start: float = perf_counter()
+            codes = [segno.make(payload, micro=False) for payload in payloads]
+            elapsed_ms: float = (perf_counter() - start) * 1000
+            code = codes[0]
+            self.stdout.write(
+                f"{kind:<10}{len(payloads[0]):>8}{code.mode:>14}{code.version:>9}"
+                f"{code.symbol_size(border=0)[0]:>9}{elapsed_ms / count:>9.3f}"
+            )
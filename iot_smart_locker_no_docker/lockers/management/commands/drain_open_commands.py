@@ -0,0 +1,162 @@
+import logging
+from datetime import timedelta
+from time import sleep
+from typing import Dict, List
+
+from django.core.mail import mail_admins
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers import routing, utils
+from iot_smart_locker_no_docker.lockers.models import Locker, OpenCommand
+
+logger = logging.getLogger("django")
+
+# commands claimed longer ago than this belong to a worker that died, and are claimed again
+CLAIM_TIMEOUT = timedelta(minutes=2)
+RETRY_DELAY = timedelta(seconds=5)  # doubled after each failed attempt
+# commands of controllers that are offline (or whose circuit is open) wait this long, without using up an attempt
+DEFER_DELAY = timedelta(seconds=10)
+
+
+class Command(BaseCommand):
+    help = "Sends pending open commands to the locker controllers. Several workers may run at once."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Batches after which a command that keeps failing is given up on",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=0.5,
+            help="Seconds to wait when there are no pending commands",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain a single batch and exit"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            drained: int = self.drain(options["batch_size"], options["max_attempts"])
+            if options["once"]:
+                return
+            if not drained:
+                sleep(options["poll_interval"])
+
+    def drain(self, batch_size: int, max_attempts: int) -> int:
+        """Sends a batch of pending commands. Returns the number of commands in the batch.
+        No transaction is held open while talking to the controllers."""
+        commands: List[OpenCommand] = self.claim(batch_size)
+        if not commands:
+            return 0
+
+        # commands of unavailable controllers would fail right away, so they wait instead
+        routes: Dict[int, routing.Route] = routing.table.get_many(
+            {c.locker_id for c in commands}
+        )
+        available: Dict[int, bool] = {
+            controller_id: utils.is_controller_available(controller_id)
+            for controller_id in {route.controller_id for route in routes.values()}
+        }
+        deferred: List[OpenCommand] = [
+            c for c in commands if not available[routes[c.locker_id].controller_id]
+        ]
+        commands = [c for c in commands if available[routes[c.locker_id].controller_id]]
+
+        results: Dict[int, bool] = {}
+        if commands:
+            results = utils.request_to_open_lockers(
+                Locker(id=locker_id) for locker_id in {c.locker_id for c in commands}
+            )
+
+        self.record(commands, results, deferred, max_attempts)
+        return len(commands) + len(deferred)
+
+    @staticmethod
+    def claim(batch_size: int) -> List[OpenCommand]:
+        now = timezone.now()
+        with transaction.atomic():
+            commands: List[OpenCommand] = list(
+                OpenCommand.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=OpenCommand.Status.PENDING, next_attempt__lte=now)
+                    | Q(
+                        status=OpenCommand.Status.SENDING,
+                        claimed__lt=now - CLAIM_TIMEOUT,
+                    )
+                )
+                .order_by("id")[:batch_size]
+            )
+            OpenCommand.objects.filter(id__in=[c.id for c in commands]).update(
+                status=OpenCommand.Status.SENDING, claimed=now
+            )
+        return commands
+
+    def record(
+        self,
+        commands: List[OpenCommand],
+        results: Dict[int, bool],
+        deferred: List[OpenCommand],
+        max_attempts: int,
+    ) -> None:
+        now = timezone.now()
+        sent_ids = [c.id for c in commands if results.get(c.locker_id)]
+        failed = [c for c in commands if not results.get(c.locker_id)]
+        given_up = [c for c in failed if c.attempts + 1 >= max_attempts]
+        retried_by_attempts: Dict[int, List[int]] = {}
+        for c in failed:
+            if c not in given_up:
+                retried_by_attempts.setdefault(c.attempts, []).append(c.id)
+
+        with transaction.atomic():
+            OpenCommand.objects.filter(id__in=sent_ids).update(
+                status=OpenCommand.Status.SENT, attempts=F("attempts") + 1, sent=now
+            )
+            for attempts, ids in retried_by_attempts.items():
+                OpenCommand.objects.filter(id__in=ids).update(
+                    status=OpenCommand.Status.PENDING,
+                    attempts=attempts + 1,
+                    next_attempt=now + RETRY_DELAY * 2**attempts,
+                )
+            OpenCommand.objects.filter(id__in=[c.id for c in deferred]).update(
+                status=OpenCommand.Status.PENDING, next_attempt=now + DEFER_DELAY
+            )
+            OpenCommand.objects.filter(id__in=[c.id for c in given_up]).update(
+                status=OpenCommand.Status.FAILED, attempts=F("attempts") + 1
+            )
+            released_ids = [c.locker_id for c in given_up if c.release_on_failure]
+            if released_ids:
+                utils.release_lockers(released_ids)
+
+        logger.info(
+            f"Open commands: {len(sent_ids)} sent, {len(failed)} failed ({len(given_up)} given up on), "
+            f"{len(deferred)} deferred as their controller is unavailable"
+        )
+        if given_up:
+            self.alert(given_up)
+
+    @staticmethod
+    def alert(given_up: List[OpenCommand]) -> None:
+        lines = [
+            f"Locker #{c.locker_id}: "
+            + (
+                "released, its QR was cancelled"
+                if c.release_on_failure
+                else "still occupied, check its QR"
+            )
+            for c in given_up
+        ]
+        logger.error("Gave up on opening lockers:\n" + "\n".join(lines))
+        mail_admins(
+            "Lockers couldn't be opened for deposits",
+            "These lockers couldn't be opened, and their recipients may have been notified already:\n"
+            + "\n".join(lines),
+            fail_silently=True,
+        )
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from iot_smart_locker_no_docker.lockers import telemetry
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the controllers' sensor readings older than the given number of days"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90)
+
+    def handle(self, *args, **options):
+        deleted: int = telemetry.prune(timedelta(days=options["days"]))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} readings"))
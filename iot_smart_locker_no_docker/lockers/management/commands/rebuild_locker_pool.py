@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from iot_smart_locker_no_docker.lockers import pool
+from iot_smart_locker_no_docker.lockers.models import Locker
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the Redis pool of free lockers from the database"
+
+    def handle(self, *args, **options):
+        if not pool.is_enabled():
+            raise CommandError("The default cache isn't backed by Redis")
+
+        free_locker_ids = (
+            Locker.objects.filter(occupied=False)
+            .values_list("id", flat=True)
+            .iterator()
+        )
+        size: int = pool.rebuild(free_locker_ids)
+        self.stdout.write(self.style.SUCCESS(f"Pool rebuilt with {size} free lockers"))
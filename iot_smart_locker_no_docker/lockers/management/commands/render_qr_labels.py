@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from iot_smart_locker_no_docker.lockers import labels
+from iot_smart_locker_no_docker.lockers.models import QR, PersonalQR
+
+
+class Command(BaseCommand):
+    help = "Renders printable QR code labels of personal QRs (or waiting QRs) to a PDF"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the PDF to write")
+        parser.add_argument(
+            "--waiting",
+            action="store_true",
+            help="Labels of the QRs of waiting packages, instead of personal QRs",
+        )
+        parser.add_argument(
+            "--users", nargs="*", type=int, help="Only the QRs of these user ids"
+        )
+        parser.add_argument(
+            "--workers", type=int, help="Rendering processes (default: one per CPU)"
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = (QR if options["waiting"] else PersonalQR).objects.all()
+        if options["users"]:
+            queryset = queryset.filter(recipient_id__in=options["users"])
+
+        count: int = labels.write_sheet(
+            queryset,
+            options["output"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {count} labels to {options['output']}")
+        )
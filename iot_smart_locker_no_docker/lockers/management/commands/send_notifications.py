@@ -0,0 +1,43 @@
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from iot_smart_locker_no_docker.lockers import notifications
+
+
+class Command(BaseCommand):
+    help = "Sends the queued package notifications. Several workers may run at once."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.LOCKERS_NOTIFICATIONS_BATCH_SIZE,
+            help="Notifications sent over each connection to the mail server",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Attempts after which a notification that keeps failing is given up on",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when there are no due notifications",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Send a single batch and exit"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent: int = notifications.send_pending(
+                options["batch_size"], options["max_attempts"]
+            )
+            if options["once"]:
+                return
+            if not sent:
+                sleep(options["poll_interval"])
@@ -0,0 +1,126 @@
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import List, Type
+
+from django.core.management.base import BaseCommand
+
+
+class SimulatedControllerHandler(BaseHTTPRequestHandler):
+    """Answers ``prefix_<door>,<door>,...`` requests like the ESP32 controller firmware does"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the firmware
+
+    doors = 32
+    latency = 0.0  # seconds
+    jitter = 0.0  # seconds, added uniformly on top of the latency
+    loss = 0.0  # probability of dropping the connection without answering
+    error_rate = 0.0  # probability of answering with error_code
+    error_code = 500
+    legacy = False  # answer with an empty body, like firmware that predates batches
+
+    def do_POST(self):
+        body: str = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        sleep(self.latency + random.uniform(0, self.jitter))
+
+        if random.random() < self.loss:
+            self.close_connection = True
+            return
+        if random.random() < self.error_rate:
+            self.answer(self.error_code, "")
+            return
+
+        try:
+            doors: List[int] = [int(door) for door in body.split("_", 1)[1].split(",")]
+        except (IndexError, ValueError):
+            self.answer(400, "")
+            return
+        if self.legacy:
+            self.answer(200, "")
+        else:
+            self.answer(
+                200,
+                "".join(
+                    f"{door} {'ok' if 0 < door <= self.doors else 'error'}\n"
+                    for door in doors
+                ),
+            )
+
+    def answer(self, status: int, body: str) -> None:
+        response: bytes = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a stand-in locker controller, to load test deposits and collections "
+        "(and the retry path) without hardware"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument(
+            "--doors", type=int, default=32, help="Doors 1 to N open, others fail"
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0, help="Milliseconds before answering"
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0,
+            help="Up to this many milliseconds added to the latency at random",
+        )
+        parser.add_argument(
+            "--loss",
+            type=float,
+            default=0,
+            help="Fraction of requests dropped without an answer",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="Fraction of requests answered with --error-code",
+        )
+        parser.add_argument("--error-code", type=int, default=500)
+        parser.add_argument(
+            "--legacy",
+            action="store_true",
+            help="Answer with an empty body, like firmware without batches",
+        )
+
+    def handle(self, *args, **options):
+        handler: Type[SimulatedControllerHandler] = type(
+            "Handler",
+            (SimulatedControllerHandler,),
+            {
+                "doors": options["doors"],
+                "latency": options["latency"] / 1000,
+                "jitter": options["jitter"] / 1000,
+                "loss": options["loss"],
+                "error_rate": options["error_rate"],
+                "error_code": options["error_code"],
+                "legacy": options["legacy"],
+            },
+        )
+        server = ThreadingHTTPServer((options["host"], options["port"]), handler)
+        server.daemon_threads = True
+        self.stdout.write(
+            f"Simulating a controller with {options['doors']} doors "
+            f"on http://{options['host']}:{server.server_port}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,32 @@
+# Generated by Django 3.1.8 on 2026-10-18 07:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0004_auto_20210416_1121'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Controller',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('url', models.URLField(help_text='e.g. http://192.168.43.212:80')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='locker',
+            name='door',
+            field=models.PositiveIntegerField(blank=True, help_text="Door index in the controller. Leave empty to use the locker's id", null=True),
+        ),
+        migrations.AddField(
+            model_name='locker',
+            name='controller',
+            field=models.ForeignKey(blank=True, help_text='Leave empty for the default controller (settings.LOCKERS_DEFAULT_CONTROLLER_URL)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='lockers', to='lockers.controller'),
+        ),
+    ]
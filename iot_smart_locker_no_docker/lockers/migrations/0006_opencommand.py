@@ -0,0 +1,25 @@
+# Generated by Django 3.1.8 on 2026-10-18 07:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0005_controller'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenCommand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('sent', models.DateTimeField(blank=True, null=True)),
+                ('locker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_commands', to='lockers.locker')),
+            ],
+        ),
+    ]
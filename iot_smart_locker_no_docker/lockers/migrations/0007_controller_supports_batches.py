@@ -0,0 +1,18 @@
+# Generated by Django 3.1.8 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0006_opencommand'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='controller',
+            name='supports_batches',
+            field=models.BooleanField(default=False, help_text='Whether the firmware can open several doors in a single request'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.8 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0007_controller_supports_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='opencommand',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='opencommand',
+            name='release_on_failure',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='opencommand',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10),
+        ),
+    ]
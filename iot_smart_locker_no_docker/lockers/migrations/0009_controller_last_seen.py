@@ -0,0 +1,18 @@
+# Generated by Django 3.1.8 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0008_opencommand_claimed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='controller',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, help_text="Last heartbeat, roughly. Empty if the firmware doesn't send heartbeats", null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.8 on 2026-10-18 08:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0009_controller_last_seen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locker',
+            name='door_changed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='locker',
+            name='door_open',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='opencommand',
+            name='opened',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DoorEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('opened', 'Opened'), ('closed', 'Closed')], max_length=10)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('locker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='lockers.locker')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.8 on 2026-10-18 08:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0010_door_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('d', 'Door (1 open, 0 closed)'), ('t', 'Temperature (°C)'), ('x', 'Tamper')], max_length=1)),
+                ('value', models.FloatField()),
+                ('recorded', models.DateTimeField(db_index=True)),
+                ('locker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='lockers.locker')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='telemetryevent',
+            index=models.Index(fields=['locker', 'recorded'], name='lockers_tel_locker__32729b_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.1.8 on 2026-10-18 08:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lockers', '0012_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='opencommand',
+            name='next_attempt',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
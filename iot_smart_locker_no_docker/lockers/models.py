@@ -7,17 +7,149 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import Model
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers import cache, tokens
 
 User: Type[Model] = get_user_model()
 
 
+class Controller(models.Model):
+    """An ESP32 that opens the doors of a bank of lockers"""
+
+    name = models.CharField(max_length=100, unique=True)
+    url = models.URLField(help_text="e.g. http://192.168.43.212:80")
+    supports_batches = models.BooleanField(
+        default=False,
+        help_text="Whether the firmware can open several doors in a single request",
+    )
+    last_seen = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last heartbeat, roughly. Empty if the firmware doesn't send heartbeats",
+    )
+
+    def __str__(self) -> str:
+        return self.name
+
+
 class Locker(models.Model):
     occupied = models.BooleanField(default=False)
+    controller = models.ForeignKey(
+        Controller,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="lockers",
+        help_text="Leave empty for the default controller (settings.LOCKERS_DEFAULT_CONTROLLER_URL)",
+    )
+    door = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Door index in the controller. Leave empty to use the locker's id",
+    )
+    # as reported by the controller's door sensor, empty if it never reported
+    door_open = models.BooleanField(null=True, blank=True)
+    door_changed = models.DateTimeField(null=True, blank=True)
 
     def __str__(self) -> str:
         return f"{self.id}"
 
 
+class OpenCommand(models.Model):
+    """Outbox of requests to open lockers, sent to the controllers by the drain_open_commands worker"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        SENDING = "sending"  # claimed by a worker
+        SENT = "sent"
+        FAILED = "failed"
+
+    locker = models.ForeignKey(
+        Locker, on_delete=models.CASCADE, related_name="open_commands"
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # whether to free the locker (and drop its QR) if the command is given up on,
+    # i.e. when the locker was allocated for this deposit
+    release_on_failure = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    claimed = models.DateTimeField(null=True, blank=True)
+    sent = models.DateTimeField(null=True, blank=True)
+    # when the controller reported the door as opened, after the command was sent
+    opened = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"Open locker #{self.locker_id} ({self.status})"
+
+
+class Notification(models.Model):
+    """Outbox of "a package is waiting" emails, sent by the send_notifications worker"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        SENDING = "sending"  # claimed by a worker
+        SENT = "sent"
+        FAILED = "failed"
+        CANCELLED = "cancelled"  # the QR was gone before the email was sent
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    email = models.EmailField()
+    # not a foreign key, as consumed QRs are deleted with raw queries, which skip cascades
+    qr_uuid = models.CharField(max_length=50)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    claimed = models.DateTimeField(null=True, blank=True)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"Notify {self.email} ({self.status})"
+
+
+class DoorEvent(models.Model):
+    """Queue of door sensor reports from the controllers, applied to the lockers by the apply_door_events worker"""
+
+    class State(models.TextChoices):
+        OPENED = "opened"
+        CLOSED = "closed"
+
+    locker = models.ForeignKey(Locker, on_delete=models.CASCADE, related_name="+")
+    state = models.CharField(max_length=10, choices=State.choices)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Locker #{self.locker_id} {self.state}"
+
+
+class TelemetryEvent(models.Model):
+    """Append-only log of the sensor readings pushed by the controllers"""
+
+    class Kind(models.TextChoices):
+        DOOR = "d", "Door (1 open, 0 closed)"
+        TEMPERATURE = "t", "Temperature (°C)"
+        TAMPER = "x", "Tamper"
+
+    locker = models.ForeignKey(Locker, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=1, choices=Kind.choices)
+    value = models.FloatField()
+    recorded = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["locker", "recorded"])]
+
+    def __str__(self) -> str:
+        return f"Locker #{self.locker_id} {self.kind}={self.value} at {self.recorded}"
+
+
 class BaseQR(models.Model):
     class Meta:
         abstract = True
@@ -35,7 +167,24 @@ class BaseQR(models.Model):
     @property
     def qr(self):
         # return qrcode.make(self.to_json()).get_image()
-        return segno.make(self.to_json())
+        return segno.make(self.get_payload())
+
+    def get_payload(self) -> str:
+        """The content encoded in the QR code"""
+        kind: str = tokens.payload_kind()
+        if kind == tokens.TOKEN:
+            return self.to_token()
+        if kind == tokens.COMPACT:
+            return self.to_compact()
+        return self.to_json()
+
+    def to_token(self) -> str:
+        return tokens.make_token(
+            self.uuid, getattr(self, "locker_id", None), self.recipient_id
+        )
+
+    def to_compact(self) -> str:
+        return tokens.make_compact(self.uuid)
 
     def to_json(self):
         return json.dumps(self._get_json_dumpable())
@@ -43,7 +192,7 @@ class BaseQR(models.Model):
     def _get_json_dumpable(self):
         return {
             "uuid": self.uuid,
-            "recipient_id": self.recipient.id,
+            "recipient_id": self.recipient_id,
         }
 
     @staticmethod
@@ -63,15 +212,36 @@ class PersonalQR(BaseQR):
     def create(recipient: User, *args, **kwargs):
         return PersonalQR(uuid=uuid.uuid4().hex, recipient=recipient)
 
+    def save(self, *args, **kwargs) -> None:
+        previous_uuid: str = self.uuid
+        super().save(*args, **kwargs)  # generates a new uuid
+        if previous_uuid:
+            cache.forget_personal_qrs([previous_uuid])
+        cache.set_personal_qr_user_id(self.uuid, self.recipient_id)
+
+    def delete(self, *args, **kwargs):
+        cache.forget_personal_qrs([self.uuid])
+        return super().delete(*args, **kwargs)
+
 
 class QR(BaseQR):
     locker = models.ForeignKey(
         Locker, on_delete=models.PROTECT
     )  # TODO what should be the on_delete policy?
 
+    def save(self, *args, **kwargs) -> None:
+        previous_uuid: str = self.uuid
+        super().save(*args, **kwargs)  # generates a new uuid
+        if previous_uuid:
+            cache.forget_qrs([previous_uuid])
+
+    def delete(self, *args, **kwargs):
+        cache.forget_qrs([self.uuid])
+        return super().delete(*args, **kwargs)
+
     def _get_json_dumpable(self) -> Dict:
         data: Dict = super()._get_json_dumpable()
-        data["locker_id"] = self.locker.id
+        data["locker_id"] = self.locker_id
         return data
 
     @staticmethod
@@ -0,0 +1,199 @@
+"""Outbox of the "a package is waiting" emails.
+
+Deposits only queue a Notification, in their own transaction, so SMTP latency and failures
+never reach the courier. Notifications of the same recipient queued shortly after each other
+(e.g. several parcels of a delivery) are merged into a single email.
+The send_notifications worker sends them, retrying failures with exponential backoff.
+A notification whose QR is gone (collected or released) by then is cancelled.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers import utils
+from iot_smart_locker_no_docker.lockers.models import QR, Notification
+
+logger = logging.getLogger("django")
+
+# notifications claimed longer ago than this belong to a worker that died, and are claimed again
+CLAIM_TIMEOUT = timedelta(minutes=2)
+RETRY_DELAY = timedelta(seconds=30)  # doubled after each failed attempt
+
+
+def enqueue(qr: QR) -> Notification:
+    """Queues the email with the (saved) QR's code, to be sent once the current transaction commits.
+    Notifications of the same recipient queued within settings.LOCKERS_NOTIFICATIONS_COALESCE_WINDOW seconds
+    of each other are due together, and sent as a single email."""
+    now: datetime = timezone.now()
+    next_attempt: datetime = (
+        Notification.objects.filter(
+            recipient_id=qr.recipient_id,
+            status=Notification.Status.PENDING,
+            attempts=0,
+            next_attempt__gt=now,
+        )
+        .values_list("next_attempt", flat=True)
+        .first()
+    ) or now + timedelta(seconds=settings.LOCKERS_NOTIFICATIONS_COALESCE_WINDOW)
+    return Notification.objects.create(
+        recipient_id=qr.recipient_id,
+        email=qr.recipient.email,
+        qr_uuid=qr.uuid,
+        next_attempt=next_attempt,
+    )
+
+
+def send_pending(batch_size: int, max_attempts: int) -> int:
+    """Sends a batch of due notifications, over a single connection to the mail server.
+    Returns the number of notifications in the batch.
+    No transaction is held open while talking to the mail server."""
+    notifications: List[Notification] = _claim(batch_size)
+    if not notifications:
+        return 0
+
+    qrs: Dict[str, QR] = {
+        qr.uuid: qr
+        for qr in QR.objects.filter(
+            uuid__in=[notification.qr_uuid for notification in notifications]
+        )
+    }
+    # a single email per recipient, listing all of their waiting QRs
+    digests: Dict[str, List[Notification]] = defaultdict(list)
+    cancelled_ids: List[int] = []
+    for notification in notifications:
+        if notification.qr_uuid in qrs:
+            digests[notification.email].append(notification)
+        else:
+            cancelled_ids.append(notification.id)
+
+    sent_ids: List[int] = []
+    failed: List[Notification] = []
+    if digests:  # not worth a connection if all of the batch was cancelled
+        sent_ids, failed = _send_digests(digests, qrs)
+
+    _record(sent_ids, cancelled_ids, failed, max_attempts)
+    return len(notifications)
+
+
+def _send_digests(
+    digests: Dict[str, List[Notification]], qrs: Dict[str, QR]
+) -> Tuple[List[int], List[Notification]]:
+    """Emails the digests over a single connection to the mail server.
+    Returns the ids of the sent notifications, and the failed ones
+    (all of them if the mail server can't be reached)."""
+    sent_ids: List[int] = []
+    failed: List[Notification] = []
+    start: float = monotonic()
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning(f"Failed to connect to the mail server: {e!r}")
+        return [], [
+            notification for digest in digests.values() for notification in digest
+        ]
+
+    try:
+        for email, digest in digests.items():
+            digest_qrs: List[QR] = list(
+                {
+                    notification.qr_uuid: qrs[notification.qr_uuid]
+                    for notification in digest
+                }.values()
+            )
+            try:
+                if len(digest_qrs) == 1:
+                    utils.send_qr_via_email(digest_qrs[0], email, connection=connection)
+                else:
+                    utils.send_qrs_via_email(digest_qrs, email, connection=connection)
+            except Exception as e:
+                logger.warning(f"Failed to notify {email}: {e!r}")
+                failed.extend(digest)
+                connection.close()  # reopened by the next email, in case it broke
+            else:
+                sent_ids.extend(notification.id for notification in digest)
+    finally:
+        connection.close()
+
+    elapsed: float = monotonic() - start
+    logger.info(
+        f"Sent {len(digests) - len({n.email for n in failed})} emails"
+        f" for {len(sent_ids)} notifications in {elapsed * 1000:.0f}ms"
+        f" ({len(sent_ids) / elapsed if elapsed else 0:.1f}/s)"
+    )
+    return sent_ids, failed
+
+
+def _claim(batch_size: int) -> List[Notification]:
+    now: datetime = timezone.now()
+    with transaction.atomic():
+        notifications: List[Notification] = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Notification.Status.PENDING, next_attempt__lte=now)
+                | Q(
+                    status=Notification.Status.SENDING,
+                    claimed__lt=now - CLAIM_TIMEOUT,
+                )
+            )
+            .order_by("next_attempt", "id")[:batch_size]
+        )
+        Notification.objects.filter(
+            id__in=[notification.id for notification in notifications]
+        ).update(status=Notification.Status.SENDING, claimed=now)
+    return notifications
+
+
+def _record(
+    sent_ids: List[int],
+    cancelled_ids: List[int],
+    failed: List[Notification],
+    max_attempts: int,
+) -> None:
+    now: datetime = timezone.now()
+    given_up: List[Notification] = [
+        notification
+        for notification in failed
+        if notification.attempts + 1 >= max_attempts
+    ]
+    retried_by_attempts: Dict[int, List[int]] = {}
+    for notification in failed:
+        if notification not in given_up:
+            retried_by_attempts.setdefault(notification.attempts, []).append(
+                notification.id
+            )
+
+    with transaction.atomic():
+        Notification.objects.filter(id__in=sent_ids).update(
+            status=Notification.Status.SENT, attempts=F("attempts") + 1, sent=now
+        )
+        Notification.objects.filter(id__in=cancelled_ids).update(
+            status=Notification.Status.CANCELLED
+        )
+        Notification.objects.filter(
+            id__in=[notification.id for notification in given_up]
+        ).update(status=Notification.Status.FAILED, attempts=F("attempts") + 1)
+        for attempts, ids in retried_by_attempts.items():
+            Notification.objects.filter(id__in=ids).update(
+                status=Notification.Status.PENDING,
+                attempts=attempts + 1,
+                next_attempt=now + RETRY_DELAY * 2**attempts,
+            )
+
+    logger.info(
+        f"Notifications: {len(sent_ids)} sent, {len(cancelled_ids)} cancelled, "
+        f"{len(failed)} failed ({len(given_up)} given up on)"
+    )
+    for notification in given_up:
+        logger.error(
+            f"Gave up on notifying {notification.email} of QR {notification.qr_uuid}"
+        )
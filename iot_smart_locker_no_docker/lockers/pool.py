@@ -0,0 +1,105 @@
+"""Pool of free locker ids, kept as a Redis set next to the django-redis cache.
+
+Allocation picks candidate ids from the pool instead of scanning the ``Locker`` table.
+The database stays the source of truth: a candidate is only used if the locker
+is still unoccupied (and not locked by a concurrent deposit), and stale entries are discarded.
+The pool only changes once the transaction that occupied or freed a locker commits,
+so rolled-back transactions never leave it out of sync.
+When the cache isn't backed by Redis (local development, tests) every operation is a no-op,
+and allocation falls back to the database.
+"""
+
+import logging
+from typing import Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger("django")
+
+FREE_LOCKERS_KEY = "lockers:free"
+REBUILD_CHUNK_SIZE = 1000
+
+
+def _get_redis():
+    if not settings.CACHES["default"]["BACKEND"].startswith("django_redis"):
+        return None
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def is_enabled() -> bool:
+    return _get_redis() is not None
+
+
+def sample(count: int) -> List[int]:
+    """Returns up to ``count`` random ids from the pool, without removing them.
+    Random ids keep concurrent deposits from contending on the same lockers."""
+    redis = _get_redis()
+    if redis is None:
+        return []
+    try:
+        locker_ids = redis.srandmember(FREE_LOCKERS_KEY, count)
+    except Exception as e:
+        logger.warning(f"Couldn't sample the free lockers pool: {e!r}")
+        return []
+    return [int(locker_id) for locker_id in locker_ids]
+
+
+def add(locker_ids: Iterable[int]) -> None:
+    """Adds lockers to the pool once the current transaction commits,
+    so a rolled-back release never advertises a locker as free."""
+    locker_ids = list(locker_ids)
+    if locker_ids:
+        transaction.on_commit(lambda: _add_now(locker_ids))
+
+
+def _add_now(locker_ids) -> None:
+    redis = _get_redis()
+    if redis is None:
+        return
+    try:
+        redis.sadd(FREE_LOCKERS_KEY, *locker_ids)
+    except Exception as e:
+        logger.warning(f"Couldn't add lockers {locker_ids} to the pool: {e!r}")
+
+
+def remove(locker_ids: Iterable[int]) -> None:
+    """Removes lockers from the pool once the current transaction commits"""
+    locker_ids = list(locker_ids)
+    if locker_ids:
+        transaction.on_commit(lambda: _remove_now(locker_ids))
+
+
+def _remove_now(locker_ids) -> None:
+    redis = _get_redis()
+    if redis is None:
+        return
+    try:
+        redis.srem(FREE_LOCKERS_KEY, *locker_ids)
+    except Exception as e:
+        logger.warning(f"Couldn't remove lockers {locker_ids} from the pool: {e!r}")
+
+
+def rebuild(free_locker_ids: Iterable[int]) -> int:
+    """Replaces the pool's content with the given ids. Returns the pool's new size."""
+    redis = _get_redis()
+    if redis is None:
+        return 0
+
+    pipe = redis.pipeline(transaction=True)
+    pipe.delete(FREE_LOCKERS_KEY)
+    chunk = []
+    size = 0
+    for locker_id in free_locker_ids:
+        chunk.append(locker_id)
+        if len(chunk) == REBUILD_CHUNK_SIZE:
+            pipe.sadd(FREE_LOCKERS_KEY, *chunk)
+            size += len(chunk)
+            chunk = []
+    if chunk:
+        pipe.sadd(FREE_LOCKERS_KEY, *chunk)
+        size += len(chunk)
+    pipe.execute()
+    return size
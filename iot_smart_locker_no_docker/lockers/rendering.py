@@ -0,0 +1,98 @@
+"""Cache of rendered QR codes.
+
+Encoding and serializing a QR code is the slow part of the deposit success page and of the notification emails.
+Renders are kept per (uuid, format, scale) in a bounded, least-recently-used cache in process memory,
+backed by the shared cache (Redis in production), and forgotten when the QR is consumed.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from iot_smart_locker_no_docker.lockers import tokens
+
+FORMATS = ("svg", "svg_inline", "png")
+MAX_SCALE = 20
+
+TIMEOUT = 60 * 60 * 24  # renders of QRs that are never consumed are regenerated daily
+
+Key = Tuple[str, str, int]
+
+
+class LRUCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Key) -> Optional[bytes]:
+        with self._lock:
+            value: Optional[bytes] = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Key, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, qr_uuids: Iterable[str]) -> None:
+        qr_uuids = set(qr_uuids)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in qr_uuids]:
+                del self._entries[key]
+
+
+local = LRUCache(settings.LOCKERS_QR_RENDER_CACHE_SIZE)
+
+
+def _shared_key(key: Key) -> str:
+    """Renders of other payload kinds (before the settings changed) expire on their own"""
+    return "lockers:qr:{}:render:{}:{}:{}".format(*key, tokens.payload_kind())
+
+
+def render(qr, format: str = "svg_inline", scale: int = 6) -> bytes:
+    """Returns the QR code (a BaseQR) as svg (a standalone document), svg_inline (for HTML) or png"""
+    if format not in FORMATS or not 1 <= scale <= MAX_SCALE:
+        raise ValueError(f"Can't render a QR as {format} at scale {scale}")
+    if not qr.uuid:  # not saved yet
+        return _render(qr, format, scale)
+
+    key: Key = (qr.uuid, format, scale)
+    rendered: Optional[bytes] = local.get(key)
+    if rendered is None:
+        rendered = cache.get(_shared_key(key))
+        if rendered is None:
+            rendered = _render(qr, format, scale)
+            cache.set(_shared_key(key), rendered, TIMEOUT)
+        local.set(key, rendered)
+    return rendered
+
+
+def forget(qr_uuids: Iterable[str]) -> None:
+    qr_uuids = list(qr_uuids)
+    local.discard(qr_uuids)
+    cache.delete_many(
+        [
+            _shared_key((qr_uuid, format, scale))
+            for qr_uuid in qr_uuids
+            for format in FORMATS
+            for scale in range(1, MAX_SCALE + 1)
+        ]
+    )
+
+
+def _render(qr, format: str, scale: int) -> bytes:
+    code = qr.qr
+    if format == "svg_inline":
+        return code.svg_inline(scale=scale).encode()
+    buffer = io.BytesIO()
+    code.save(buffer, kind=format, scale=scale)
+    return buffer.getvalue()
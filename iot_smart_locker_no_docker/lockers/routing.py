@@ -0,0 +1,116 @@
+"""In-memory routing table from lockers to the controller (and door) that opens them.
+
+Each worker process loads the table on first use, and reloads it when a controller or
+a locker's routing changes. Changes are announced through a version number in the shared cache,
+which is checked at most every CHECK_INTERVAL seconds.
+"""
+
+import threading
+from time import monotonic
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from iot_smart_locker_no_docker.lockers.models import Locker
+
+VERSION_KEY = "lockers:routing:version"
+CHECK_INTERVAL = 5  # seconds
+
+DEFAULT_CONTROLLER_ID = 0
+
+
+class Route(NamedTuple):
+    controller_id: int
+    url: str
+    door: int
+    supports_batches: bool
+
+
+class RoutingTable:
+    def __init__(self):
+        self._routes: Optional[Dict[int, Route]] = None
+        self._controller_ids: Set[int] = set()
+        self._lockers_by_door: Dict[Tuple[int, int], int] = {}
+        self._version: Optional[int] = None
+        self._checked_at: float = 0
+        self._lock = threading.Lock()
+
+    def get(self, locker_id: int) -> Route:
+        return self._get_routes().get(locker_id) or self._default_route(locker_id)
+
+    def get_many(self, locker_ids: Iterable[int]) -> Dict[int, Route]:
+        return {locker_id: self.get(locker_id) for locker_id in locker_ids}
+
+    def controller_ids(self) -> Set[int]:
+        """Controllers that have lockers assigned to them"""
+        self._get_routes()
+        return self._controller_ids
+
+    def find_locker(self, controller_id: int, door: int) -> Optional[int]:
+        """The locker behind a door of a controller, other than the default one"""
+        self._get_routes()
+        return self._lockers_by_door.get((controller_id, door))
+
+    def reset(self) -> None:
+        """Makes the table reload on next use"""
+        with self._lock:
+            self._routes = None
+
+    def _get_routes(self) -> Dict[int, Route]:
+        with self._lock:
+            now: float = monotonic()
+            if self._routes is None or now - self._checked_at > CHECK_INTERVAL:
+                self._checked_at = now
+                version: int = cache.get_or_set(VERSION_KEY, 1, None)
+                if self._routes is None or version != self._version:
+                    self._routes = self._load()
+                    self._controller_ids = {
+                        route.controller_id for route in self._routes.values()
+                    }
+                    self._lockers_by_door = {
+                        (route.controller_id, route.door): locker_id
+                        for locker_id, route in self._routes.items()
+                    }
+                    self._version = version
+            return self._routes
+
+    @staticmethod
+    def _load() -> Dict[int, Route]:
+        routed_lockers = Locker.objects.filter(controller__isnull=False).values_list(
+            "id",
+            "door",
+            "controller_id",
+            "controller__url",
+            "controller__supports_batches",
+        )
+        return {
+            locker_id: Route(
+                controller_id,
+                url,
+                locker_id if door is None else door,
+                supports_batches,
+            )
+            for locker_id, door, controller_id, url, supports_batches in routed_lockers.iterator()
+        }
+
+    @staticmethod
+    def _default_route(locker_id: int) -> Route:
+        return Route(
+            DEFAULT_CONTROLLER_ID,
+            settings.LOCKERS_DEFAULT_CONTROLLER_URL,
+            locker_id,
+            settings.LOCKERS_DEFAULT_CONTROLLER_SUPPORTS_BATCHES,
+        )
+
+
+table = RoutingTable()
+
+
+def invalidate() -> None:
+    """Makes all worker processes reload their routing table"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # no version yet
+        cache.set(VERSION_KEY, 1, None)
+    table.reset()  # reload right away in this process
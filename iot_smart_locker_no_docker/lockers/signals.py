@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from iot_smart_locker_no_docker.lockers import cache, routing
+from iot_smart_locker_no_docker.lockers.models import Controller, Locker
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_nfc_serial(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "nfc_serial" not in update_fields:
+        return  # e.g. updating last_login on every login
+    instance._previous_nfc_serial = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("nfc_serial", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def forget_changed_nfc_serial(sender, instance, **kwargs):
+    previous_nfc_serial = getattr(instance, "_previous_nfc_serial", None)
+    if previous_nfc_serial != instance.nfc_serial:
+        # after commit, or a concurrent tap could cache the old serial again from the database
+        nfc_serials = [previous_nfc_serial, instance.nfc_serial]
+        transaction.on_commit(lambda: cache.forget_nfc_serials(nfc_serials))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_nfc_serial(sender, instance, **kwargs):
+    nfc_serial = instance.nfc_serial
+    transaction.on_commit(lambda: cache.forget_nfc_serials([nfc_serial]))
+
+
+@receiver(post_save, sender=Controller)
+@receiver(post_delete, sender=Controller)
+def reload_routing_for_controller(sender, instance, **kwargs):
+    # after commit, or other workers could reload the old rows and keep them
+    transaction.on_commit(routing.invalidate)
+
+
+@receiver(post_save, sender=Locker)
+@receiver(post_delete, sender=Locker)
+def reload_routing_for_locker(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {"controller", "door"} & set(update_fields):
+        return  # e.g. occupying or freeing the locker
+    transaction.on_commit(routing.invalidate)
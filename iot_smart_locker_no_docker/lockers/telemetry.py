@@ -0,0 +1,82 @@
+"""Sensor readings pushed by the locker controllers, in batches.
+
+Each reading is a ``<door> <kind> <value> [<unix time>]`` line, e.g. ``3 t 21.5 1618000000``,
+with the kinds of TelemetryEvent.Kind. Readings without a time are recorded at the time they're received.
+A batch is written with a single multi-row INSERT (per BATCH_SIZE rows), never a query per reading.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, List, NamedTuple
+
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers import doors
+from iot_smart_locker_no_docker.lockers.models import TelemetryEvent
+
+logger = logging.getLogger("django")
+
+BATCH_SIZE = 1000  # rows per INSERT
+
+
+class Reading(NamedTuple):
+    door: int
+    kind: str
+    value: float
+    recorded: datetime
+
+
+def parse_readings(body: str) -> List[Reading]:
+    """Skips malformed lines"""
+    now: datetime = timezone.now()
+    readings: List[Reading] = []
+    for line in body.splitlines():
+        try:
+            door, kind, value, *recorded = line.split()
+            if len(recorded) > 1:
+                raise ValueError("too many fields")
+            readings.append(
+                Reading(
+                    int(door),
+                    TelemetryEvent.Kind(kind),
+                    float(value),
+                    (
+                        datetime.fromtimestamp(float(recorded[0]), dt_timezone.utc)
+                        if recorded
+                        else now
+                    ),
+                )
+            )
+        except (ValueError, OverflowError, OSError):
+            logger.warning(f"Unexpected line in the controller's telemetry: {line!r}")
+    return readings
+
+
+def record_readings(controller_id: int, readings: List[Reading]) -> int:
+    """Returns the number of readings recorded"""
+    locker_ids: Dict[int, int] = doors.find_lockers(
+        controller_id, {reading.door for reading in readings}
+    )
+    events: List[TelemetryEvent] = [
+        TelemetryEvent(
+            locker_id=locker_ids[reading.door],
+            kind=reading.kind,
+            value=reading.value,
+            recorded=reading.recorded,
+        )
+        for reading in readings
+        if reading.door in locker_ids
+    ]
+    TelemetryEvent.objects.bulk_create(events, batch_size=BATCH_SIZE)
+    if len(events) < len(readings):
+        logger.warning(f"Telemetry for unknown doors of controller #{controller_id}")
+    return len(events)
+
+
+def prune(older_than: timedelta) -> int:
+    """Deletes old readings. Returns the number of readings deleted."""
+    deleted, _ = TelemetryEvent.objects.filter(
+        recorded__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
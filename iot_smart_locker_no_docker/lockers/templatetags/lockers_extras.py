@@ -1,5 +1,9 @@
 from django import template
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.urls import reverse
 
+from iot_smart_locker_no_docker.lockers import rendering
 from iot_smart_locker_no_docker.lockers.models import BaseQR
 
 register = template.Library()
@@ -7,4 +11,15 @@ register = template.Library()
 
 @register.filter(name="svg_inline")
 def qr_svg_inline(qr: BaseQR, scale: int):
-    return qr.qr.svg_inline(scale=scale)
+    return rendering.render(qr, "svg_inline", scale).decode()
+
+
+@register.simple_tag(takes_context=True)
+def qr_image_url(context, qr: BaseQR, format: str = "png", scale: int = 6) -> str:
+    """Absolute URL of the QR's image, which emails need as well"""
+    path = f"{reverse('lockers:qr_image', args=[qr.uuid, format])}?scale={scale}"
+    request = context.get("request")
+    if request is not None:
+        return request.build_absolute_uri(path)
+    scheme = "http" if settings.DEBUG else "https"
+    return f"{scheme}://{Site.objects.get_current().domain}{path}"
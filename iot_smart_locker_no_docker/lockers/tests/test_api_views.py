@@ -0,0 +1,223 @@
+import pytest
+from django.test import RequestFactory
+
+from iot_smart_locker_no_docker.lockers import cache
+from iot_smart_locker_no_docker.lockers.api.views import (
+    open_lockers_with_nfc,
+    open_lockers_with_personal_qr,
+    open_single_locker_with_qr,
+)
+from iot_smart_locker_no_docker.lockers.models import QR, Locker, PersonalQR
+from iot_smart_locker_no_docker.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+class TestOpenSingleLockerWithQR:
+    def test_collect(
+        self, user: User, rf: RequestFactory, django_assert_max_num_queries
+    ):
+        locker = Locker.objects.create(occupied=True)
+        qr = QR.objects.create(recipient=user, locker=locker)
+
+        with django_assert_max_num_queries(4):  # a DELETE and an UPDATE, in a savepoint
+            response = open_single_locker_with_qr(rf.get("/fake-url/"), uuid=qr.uuid)
+
+        assert response.status_code == 200 + locker.id
+        assert not QR.objects.filter(id=qr.id).exists()
+        locker.refresh_from_db()
+        assert not locker.occupied
+
+    def test_collect_twice(self, user: User, rf: RequestFactory):
+        locker = Locker.objects.create(occupied=True)
+        qr = QR.objects.create(recipient=user, locker=locker)
+
+        open_single_locker_with_qr(rf.get("/fake-url/"), uuid=qr.uuid)
+        response = open_single_locker_with_qr(rf.get("/fake-url/"), uuid=qr.uuid)
+
+        assert response.status_code == 500
+
+    def test_unknown_uuid(self, rf: RequestFactory):
+        response = open_single_locker_with_qr(rf.get("/fake-url/"), uuid="nope")
+
+        assert response.status_code == 500
+
+
+class TestOpenLockersWithNFC:
+    def test_collect(self, user: User, rf: RequestFactory):
+        user.nfc_serial = "04:A2:19:6B"
+        user.save()
+        locker = Locker.objects.create(occupied=True)
+        QR.objects.create(recipient=user, locker=locker)
+
+        response = open_lockers_with_nfc(rf.get("/fake-url/"), serial="04:A2:19:6B")
+
+        assert response.status_code == 200 + locker.id
+        assert cache.get_nfc_user_id("04:A2:19:6B") == user.id
+
+    def test_collect_several_packages(self, user: User, rf: RequestFactory):
+        user.nfc_serial = "04:A2:19:6B"
+        user.save()
+        lockers = [Locker.objects.create(occupied=True) for _ in range(3)]
+        for locker in lockers:
+            QR.objects.create(recipient=user, locker=locker)
+        request = rf.get("/fake-url/", HTTP_X_LOCKER_PROTOCOL="2")
+
+        response = open_lockers_with_nfc(request, serial="04:A2:19:6B")
+
+        assert response.status_code == 200
+        assert response.content.decode() == "v2\n" + "".join(
+            f"{locker.id} 0 {locker.id}\n" for locker in lockers
+        )
+        assert not QR.objects.exists()
+
+    def test_collect_several_packages_with_legacy_protocol(
+        self, user: User, rf: RequestFactory
+    ):
+        """The legacy protocol opens a single door per response, so the other packages stay"""
+        user.nfc_serial = "04:A2:19:6B"
+        user.save()
+        lockers = [Locker.objects.create(occupied=True) for _ in range(3)]
+        for locker in lockers:
+            QR.objects.create(recipient=user, locker=locker)
+
+        for locker in lockers:
+            response = open_lockers_with_nfc(rf.get("/fake-url/"), serial="04:A2:19:6B")
+
+            assert response.status_code == 200 + locker.id
+            assert response.content.decode() == str(locker.id)
+            assert not Locker.objects.get(id=locker.id).occupied
+            assert not QR.objects.filter(locker=locker).exists()
+        assert not QR.objects.exists()
+
+        response = open_lockers_with_nfc(rf.get("/fake-url/"), serial="04:A2:19:6B")
+        assert response.status_code == 500
+
+    @pytest.mark.django_db(transaction=True)
+    def test_changed_serial(self, user: User, rf: RequestFactory):
+        user.nfc_serial = "04:A2:19:6B"
+        user.save()
+        QR.objects.create(recipient=user, locker=Locker.objects.create(occupied=True))
+        open_lockers_with_nfc(rf.get("/fake-url/"), serial="04:A2:19:6B")
+
+        user.nfc_serial = "04:FF:00:11"
+        user.save()
+
+        assert cache.get_nfc_user_id("04:A2:19:6B") is None
+        response = open_lockers_with_nfc(rf.get("/fake-url/"), serial="04:A2:19:6B")
+        assert response.status_code == 500
+
+
+class TestCompactProtocol:
+    def test_collect(self, user: User, rf: RequestFactory):
+        locker = Locker.objects.create(id=1234, occupied=True)
+        qr = QR.objects.create(recipient=user, locker=locker)
+        request = rf.get("/fake-url/", HTTP_X_LOCKER_PROTOCOL="2")
+
+        response = open_single_locker_with_qr(request, uuid=qr.uuid)
+
+        assert response.status_code == 200
+        assert response.content.decode() == "v2\n1234 0 1234\n"
+
+    def test_unsupported_version_falls_back_to_legacy(
+        self, user: User, rf: RequestFactory
+    ):
+        locker = Locker.objects.create(occupied=True)
+        qr = QR.objects.create(recipient=user, locker=locker)
+        request = rf.get("/fake-url/", {"protocol": "99"})
+
+        response = open_single_locker_with_qr(request, uuid=qr.uuid)
+
+        assert response.status_code == 200 + locker.id
+
+
+class TestOpenLockersWithPersonalQR:
+    def test_collect_several_packages(
+        self, user: User, rf: RequestFactory, django_assert_max_num_queries
+    ):
+        personal_qr = PersonalQR.objects.create(recipient=user)
+        assert cache.get_personal_qr_user_id(personal_qr.uuid) == user.id
+        lockers = [Locker.objects.create(occupied=True) for _ in range(3)]
+        for locker in lockers:
+            QR.objects.create(recipient=user, locker=locker)
+
+        request = rf.get("/fake-url/", HTTP_X_LOCKER_PROTOCOL="2")
+
+        with django_assert_max_num_queries(4):  # a DELETE and an UPDATE, in a savepoint
+            response = open_lockers_with_personal_qr(request, uuid=personal_qr.uuid)
+
+        assert response.status_code == 200
+        assert response.content.decode() == "v2\n" + "".join(
+            f"{locker.id} 0 {locker.id}\n" for locker in lockers
+        )
+        assert not QR.objects.exists()
+        assert not Locker.objects.filter(occupied=True).exists()
+
+    def test_collect_several_packages_with_legacy_protocol(
+        self, user: User, rf: RequestFactory
+    ):
+        personal_qr = PersonalQR.objects.create(recipient=user)
+        lockers = [Locker.objects.create(occupied=True) for _ in range(2)]
+        for locker in lockers:
+            QR.objects.create(recipient=user, locker=locker)
+
+        response = open_lockers_with_personal_qr(
+            rf.get("/fake-url/"), uuid=personal_qr.uuid
+        )
+
+        assert response.status_code == 200 + lockers[0].id
+        assert response.content.decode() == str(lockers[0].id)
+        assert list(QR.objects.values_list("locker_id", flat=True)) == [lockers[1].id]
+        assert Locker.objects.get(id=lockers[1].id).occupied
+
+        response = open_lockers_with_personal_qr(
+            rf.get("/fake-url/"), uuid=personal_qr.uuid
+        )
+
+        assert response.status_code == 200 + lockers[1].id
+        assert not QR.objects.exists()
+
+    def test_collect_with_old_token(self, user: User, rf: RequestFactory, settings):
+        """Personal QRs are printed once, so their tokens never expire"""
+        settings.LOCKERS_QR_TOKEN_MAX_AGE = -1
+        personal_qr = PersonalQR.objects.create(recipient=user)
+        locker = Locker.objects.create(occupied=True)
+        QR.objects.create(recipient=user, locker=locker)
+
+        response = open_lockers_with_personal_qr(
+            rf.get("/fake-url/"), uuid=personal_qr.to_token()
+        )
+
+        assert response.status_code == 200 + locker.id
+
+    def test_collect_without_cache(self, user: User, rf: RequestFactory):
+        personal_qr = PersonalQR.objects.create(recipient=user)
+        cache.forget_personal_qrs([personal_qr.uuid])
+        locker = Locker.objects.create(occupied=True)
+        QR.objects.create(recipient=user, locker=locker)
+
+        response = open_lockers_with_personal_qr(
+            rf.get("/fake-url/"), uuid=personal_qr.uuid
+        )
+
+        assert response.status_code == 200 + locker.id
+        assert cache.get_personal_qr_user_id(personal_qr.uuid) == user.id
+
+    def test_nothing_waiting(self, user: User, rf: RequestFactory):
+        personal_qr = PersonalQR.objects.create(recipient=user)
+
+        response = open_lockers_with_personal_qr(
+            rf.get("/fake-url/"), uuid=personal_qr.uuid
+        )
+
+        assert response.status_code == 500
+
+    def test_regenerated_code(self, user: User, rf: RequestFactory):
+        personal_qr = PersonalQR.objects.create(recipient=user)
+        old_uuid = personal_qr.uuid
+        personal_qr.save()
+        QR.objects.create(recipient=user, locker=Locker.objects.create(occupied=True))
+
+        response = open_lockers_with_personal_qr(rf.get("/fake-url/"), uuid=old_uuid)
+
+        assert response.status_code == 500
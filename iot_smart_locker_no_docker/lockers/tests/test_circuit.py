@@ -0,0 +1,60 @@
+from time import sleep
+
+import pytest
+
+from iot_smart_locker_no_docker.lockers import utils
+from iot_smart_locker_no_docker.lockers.circuit import CircuitBreaker
+
+
+def failing():
+    raise OSError("controller is down")
+
+
+def test_opens_after_threshold():
+    circuit = CircuitBreaker("test-threshold", failure_threshold=3, reset_timeout=60)
+
+    for _ in range(2):
+        circuit.record_failure()
+    assert circuit.allow_request()
+
+    circuit.record_failure()
+    assert not circuit.allow_request()
+
+
+def test_half_open_lets_a_single_probe_through():
+    circuit = CircuitBreaker("test-probe", failure_threshold=1, reset_timeout=0.1)
+    circuit.record_failure()
+    sleep(0.2)
+
+    assert circuit.allow_request()
+    assert not circuit.allow_request()
+
+    circuit.record_success()
+    assert circuit.allow_request()
+    assert circuit.allow_request()
+
+
+def test_failed_probe_opens_again():
+    circuit = CircuitBreaker(
+        "test-failed-probe", failure_threshold=2, reset_timeout=0.1
+    )
+    circuit.record_failure()
+    circuit.record_failure()
+    sleep(0.2)
+    assert circuit.allow_request()
+
+    circuit.record_failure()
+
+    assert circuit.is_open()
+
+
+def test_retry_fails_fast_when_open(settings):
+    settings.LOCKERS_HW_RETRY_BASE_DELAY = 0.001
+    circuit = CircuitBreaker("test-retry", failure_threshold=2, reset_timeout=60)
+
+    with pytest.raises(ConnectionError):
+        utils.retry(failing, max_attempts=10, circuit=circuit)
+    assert circuit.is_open()
+
+    with pytest.raises(ConnectionError):
+        utils.retry(failing, max_attempts=10, circuit=circuit)
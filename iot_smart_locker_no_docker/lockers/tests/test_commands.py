@@ -0,0 +1,117 @@
+import threading
+from datetime import timedelta
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers import utils
+from iot_smart_locker_no_docker.lockers.hardware import HardwareClient
+from iot_smart_locker_no_docker.lockers.management.commands.simulate_controller import (
+    SimulatedControllerHandler,
+)
+from iot_smart_locker_no_docker.lockers.models import (
+    QR,
+    Controller,
+    Locker,
+    OpenCommand,
+)
+from iot_smart_locker_no_docker.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()  # circuits and liveness
+
+
+def test_drain_open_commands(monkeypatch):
+    opened, broken = Locker.objects.create(), Locker.objects.create()
+    utils.enqueue_open_command(opened)
+    utils.enqueue_open_command(broken)
+    monkeypatch.setattr(
+        utils,
+        "request_to_open_lockers",
+        lambda lockers: {locker.id: locker.id == opened.id for locker in lockers},
+    )
+
+    call_command("drain_open_commands", "--once", "--max-attempts=2")
+
+    assert OpenCommand.objects.get(locker=opened).status == OpenCommand.Status.SENT
+    retried = OpenCommand.objects.get(locker=broken)
+    assert retried.status == OpenCommand.Status.PENDING
+    assert retried.attempts == 1
+    assert retried.next_attempt > timezone.now()
+
+    call_command("drain_open_commands", "--once", "--max-attempts=2")
+    assert OpenCommand.objects.get(locker=broken).status == OpenCommand.Status.PENDING
+
+    OpenCommand.objects.update(next_attempt=timezone.now())
+    call_command("drain_open_commands", "--once", "--max-attempts=2")
+
+    assert OpenCommand.objects.get(locker=broken).status == OpenCommand.Status.FAILED
+
+
+def test_drain_open_commands_releases_given_up_lockers(user: User, monkeypatch):
+    locker = Locker.objects.create(occupied=True)
+    QR.objects.create(recipient=user, locker=locker)
+    utils.enqueue_open_command(locker, release_on_failure=True)
+    monkeypatch.setattr(
+        utils,
+        "request_to_open_lockers",
+        lambda lockers: {locker.id: False for locker in lockers},
+    )
+
+    call_command("drain_open_commands", "--once", "--max-attempts=1")
+
+    assert OpenCommand.objects.get(locker=locker).status == OpenCommand.Status.FAILED
+    assert not QR.objects.exists()
+    assert not Locker.objects.get(id=locker.id).occupied
+
+
+@pytest.mark.django_db(transaction=True)
+def test_drain_open_commands_defers_unavailable_controllers(user: User, monkeypatch):
+    offline = Controller.objects.create(
+        name="bank-a",
+        url="http://10.0.0.2:80",
+        last_seen=timezone.now() - timedelta(minutes=5),
+    )
+    locker = Locker.objects.create(occupied=True, controller=offline)
+    QR.objects.create(recipient=user, locker=locker)
+    utils.enqueue_open_command(locker, release_on_failure=True)
+
+    def request_to_open_lockers(lockers):
+        raise AssertionError("the controller shouldn't be called")
+
+    monkeypatch.setattr(utils, "request_to_open_lockers", request_to_open_lockers)
+
+    call_command("drain_open_commands", "--once", "--max-attempts=1")
+
+    command = OpenCommand.objects.get(locker=locker)
+    assert command.status == OpenCommand.Status.PENDING
+    assert command.attempts == 0
+    assert command.next_attempt > timezone.now()
+    assert QR.objects.exists()
+
+
+def test_simulated_controller(monkeypatch):
+    monkeypatch.setattr(SimulatedControllerHandler, "doors", 4)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SimulatedControllerHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    client = HardwareClient(connect_timeout=1, read_timeout=1)
+
+    try:
+        assert client.open_doors(url, [1, 4, 5]) == {1: True, 4: True, 5: False}
+
+        monkeypatch.setattr(SimulatedControllerHandler, "error_rate", 1)
+        with pytest.raises(requests.HTTPError):
+            client.open_doors(url, [1])
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
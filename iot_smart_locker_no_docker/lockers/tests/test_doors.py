@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from iot_smart_locker_no_docker.lockers import doors, routing
+from iot_smart_locker_no_docker.lockers.models import (
+    Controller,
+    DoorEvent,
+    Locker,
+    OpenCommand,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_parse_events():
+    assert doors.parse_events("3 opened\nbogus\n5 closed\n7 ajar\n") == [
+        (3, DoorEvent.State.OPENED),
+        (5, DoorEvent.State.CLOSED),
+    ]
+
+
+def test_report_door_events(client):
+    locker = Locker.objects.create(occupied=True)
+    command = OpenCommand.objects.create(locker=locker, status=OpenCommand.Status.SENT)
+
+    response = client.post(
+        reverse("lockers:report_door_events", args=[routing.DEFAULT_CONTROLLER_ID]),
+        f"{locker.id} opened\n{locker.id} closed\n999999 opened\n",
+        content_type="text/plain",
+    )
+
+    assert response.status_code == 202
+    assert DoorEvent.objects.count() == 2
+    assert Locker.objects.get(id=locker.id).door_open is None  # not applied yet
+
+    call_command("apply_door_events", "--once")
+
+    locker.refresh_from_db()
+    assert locker.door_open is False
+    assert locker.door_changed is not None
+    assert OpenCommand.objects.get(id=command.id).opened is not None
+    assert not DoorEvent.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_door_events_of_routed_lockers():
+    controller = Controller.objects.create(name="bank-a", url="http://10.0.0.2:80")
+    locker = Locker.objects.create(controller=controller, door=3)
+
+    doors.record_events(controller.id, [(3, DoorEvent.State.OPENED), (4, "opened")])
+    doors.apply_events(batch_size=10)
+
+    assert Locker.objects.get(id=locker.id).door_open is True
@@ -0,0 +1,101 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+
+import pytest
+import requests
+
+from iot_smart_locker_no_docker.lockers import hardware, utils
+from iot_smart_locker_no_docker.lockers.hardware import (
+    HardwareClient,
+    parse_door_results,
+)
+from iot_smart_locker_no_docker.lockers.models import Locker
+
+
+class SlowControllerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    delay = 0.0
+
+    broken_doors = ()
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self.received.append(body)
+        doors = body.split("_", 1)[1].split(",")
+        sleep(self.delay)
+        response = "".join(
+            f"{door} {'error' if int(door) in self.broken_doors else 'ok'}\n"
+            for door in doors
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def controller_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowControllerHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    hardware.client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_reuses_connection(controller_url: str):
+    client = HardwareClient(connect_timeout=1, read_timeout=1)
+
+    first = client.post(controller_url, "prefix_1", headers={})
+    second = client.post(controller_url, "prefix_2", headers={})
+
+    assert first.status_code == second.status_code == 200
+    assert len(client._sessions) == 1
+    client.close()
+
+
+def test_post_times_out(controller_url: str, monkeypatch):
+    monkeypatch.setattr(SlowControllerHandler, "delay", 0.5)
+    client = HardwareClient(connect_timeout=1, read_timeout=0.1)
+
+    with pytest.raises(requests.Timeout):
+        client.post(controller_url, "prefix_1", headers={})
+    client.close()
+
+
+def test_open_doors(controller_url: str, monkeypatch):
+    monkeypatch.setattr(SlowControllerHandler, "broken_doors", (5,))
+    client = HardwareClient(connect_timeout=1, read_timeout=1)
+
+    assert client.open_doors(controller_url, [3, 5, 7]) == {3: True, 5: False, 7: True}
+    client.close()
+
+
+def test_parse_door_results_of_legacy_firmware():
+    assert parse_door_results("", [3]) == {3: True}
+    assert parse_door_results("", [3, 5]) == {3: False, 5: False}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("supports_batches", [True, False])
+def test_request_to_open_lockers(
+    controller_url: str, supports_batches: bool, settings, monkeypatch
+):
+    settings.LOCKERS_DEFAULT_CONTROLLER_URL = controller_url
+    settings.LOCKERS_DEFAULT_CONTROLLER_SUPPORTS_BATCHES = supports_batches
+    lockers = [Locker.objects.create() for _ in range(3)]
+    monkeypatch.setattr(SlowControllerHandler, "broken_doors", (lockers[1].id,))
+    monkeypatch.setattr(SlowControllerHandler, "received", [])
+
+    assert utils.request_to_open_lockers(lockers) == {
+        lockers[0].id: True,
+        lockers[1].id: False,
+        lockers[2].id: True,
+    }
+    assert len(SlowControllerHandler.received) == (1 if supports_batches else 3)
@@ -0,0 +1,63 @@
+import re
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from iot_smart_locker_no_docker.lockers import admin, labels
+from iot_smart_locker_no_docker.lockers.models import PersonalQR
+from iot_smart_locker_no_docker.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def count_pages(path) -> int:
+    """Of the latest page tree, as appending pages adds a new one"""
+    with open(path, "rb") as pdf:
+        return int(re.findall(rb"/Count\s+(\d+)", pdf.read())[-1])
+
+
+def test_write_sheet(tmp_path):
+    for _ in range(labels.LABELS_PER_PAGE + 2):
+        PersonalQR.objects.create(recipient=UserFactory())
+    path = str(tmp_path / "labels.pdf")
+
+    count = labels.write_sheet(PersonalQR.objects.all(), path, workers=2, chunk_size=20)
+
+    assert count == labels.LABELS_PER_PAGE + 2
+    assert count_pages(path) == 2
+
+
+def test_render_qr_labels_command(tmp_path):
+    PersonalQR.objects.create(recipient=UserFactory())
+    path = str(tmp_path / "labels.pdf")
+
+    call_command("render_qr_labels", path, "--workers=1")
+
+    assert count_pages(path) == 1
+
+
+def test_print_labels_action(admin_client):
+    qr = PersonalQR.objects.create(recipient=UserFactory())
+
+    response = admin_client.post(
+        reverse("admin:lockers_personalqr_changelist"),
+        {"action": "print_labels", "_selected_action": [qr.id]},
+    )
+
+    assert response["Content-Type"] == "application/pdf"
+
+
+def test_print_too_many_labels_action(admin_client):
+    qrs = [
+        PersonalQR.objects.create(recipient=UserFactory())
+        for _ in range(admin.ADMIN_LABELS_LIMIT + 1)
+    ]
+
+    response = admin_client.post(
+        reverse("admin:lockers_personalqr_changelist"),
+        {"action": "print_labels", "_selected_action": [qr.id for qr in qrs]},
+        follow=True,
+    )
+
+    assert "render_qr_labels" in response.content.decode()
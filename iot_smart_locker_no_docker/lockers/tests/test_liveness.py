@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers import hardware, liveness, utils
+from iot_smart_locker_no_docker.lockers.models import Controller, Locker
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def test_heartbeat(client):
+    controller = Controller.objects.create(name="bank-a", url="http://10.0.0.2:80")
+
+    response = client.post(
+        reverse("lockers:controller_heartbeat", args=[controller.id])
+    )
+
+    assert response.status_code == 200
+    assert Controller.objects.get(id=controller.id).last_seen is not None
+    assert liveness.is_online(controller.id)
+
+
+def test_heartbeat_of_unknown_controller(client):
+    response = client.post(reverse("lockers:controller_heartbeat", args=[1234]))
+
+    assert response.status_code == 404
+
+
+def test_offline_from_database(settings):
+    settings.LOCKERS_CONTROLLER_HEARTBEAT_TIMEOUT = 30
+    silent = Controller.objects.create(
+        name="bank-a",
+        url="http://10.0.0.2:80",
+        last_seen=timezone.now() - timedelta(minutes=5),
+    )
+    legacy = Controller.objects.create(name="bank-b", url="http://10.0.0.3:80")
+
+    assert liveness.offline_controller_ids([silent.id, legacy.id]) == {silent.id}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_allocation_skips_offline_controllers():
+    offline = Controller.objects.create(
+        name="bank-a",
+        url="http://10.0.0.2:80",
+        last_seen=timezone.now() - timedelta(minutes=5),
+    )
+    Locker.objects.create(controller=offline)
+    online_locker = Locker.objects.create()
+
+    assert utils.get_unoccupied_locker() == online_locker
+    assert utils.get_unoccupied_locker() is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_open_fails_fast_on_offline_controller(monkeypatch):
+    offline = Controller.objects.create(
+        name="bank-a",
+        url="http://10.0.0.2:80",
+        last_seen=timezone.now() - timedelta(minutes=5),
+    )
+    locker = Locker.objects.create(controller=offline)
+
+    def open_doors(url, doors):
+        raise AssertionError("the controller shouldn't be called")
+
+    monkeypatch.setattr(hardware.client, "open_doors", open_doors)
+
+    assert utils.request_to_open_lockers([locker]) == {locker.id: False}
@@ -0,0 +1,130 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.utils import timezone
+
+from iot_smart_locker_no_docker.lockers import notifications, utils
+from iot_smart_locker_no_docker.lockers.models import QR, Locker, Notification
+from iot_smart_locker_no_docker.users.models import User
+from iot_smart_locker_no_docker.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_coalescing(settings):
+    settings.LOCKERS_NOTIFICATIONS_COALESCE_WINDOW = 0
+
+
+@pytest.fixture
+def qr(user: User) -> QR:
+    return QR.objects.create(recipient=user, locker=Locker.objects.create())
+
+
+def test_send_notifications(qr: QR):
+    notification = notifications.enqueue(qr)
+
+    call_command("send_notifications", "--once")
+
+    assert (
+        Notification.objects.get(id=notification.id).status == Notification.Status.SENT
+    )
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == [qr.recipient.email]
+
+
+def test_notifications_share_a_connection():
+    for _ in range(3):
+        notifications.enqueue(
+            QR.objects.create(recipient=UserFactory(), locker=Locker.objects.create())
+        )
+
+    assert notifications.send_pending(batch_size=10, max_attempts=3) == 3
+
+    assert len(mail.outbox) == 3
+    assert len({id(message.connection) for message in mail.outbox}) == 1
+
+
+def test_notifications_of_a_recipient_are_coalesced(user: User, settings):
+    settings.LOCKERS_NOTIFICATIONS_COALESCE_WINDOW = 60
+    for _ in range(3):
+        notifications.enqueue(
+            QR.objects.create(recipient=user, locker=Locker.objects.create())
+        )
+
+    assert notifications.send_pending(batch_size=10, max_attempts=3) == 0  # not due yet
+    assert Notification.objects.values("next_attempt").distinct().count() == 1
+
+    Notification.objects.update(next_attempt=timezone.now())
+    notifications.send_pending(batch_size=10, max_attempts=3)
+
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == "3 packages are waiting for you"
+    assert not Notification.objects.exclude(status=Notification.Status.SENT).exists()
+
+
+def test_notification_of_collected_qr_is_cancelled(qr: QR):
+    notification = notifications.enqueue(qr)
+    utils.consume_qr(qr.uuid)
+
+    notifications.send_pending(batch_size=10, max_attempts=3)
+
+    assert (
+        Notification.objects.get(id=notification.id).status
+        == Notification.Status.CANCELLED
+    )
+    assert not mail.outbox
+
+
+def test_failed_notification_is_retried_later(qr: QR, monkeypatch):
+    notification = notifications.enqueue(qr)
+
+    def send_qr_via_email(qr, target, connection=None):
+        raise OSError("SMTP is down")
+
+    monkeypatch.setattr(utils, "send_qr_via_email", send_qr_via_email)
+
+    notifications.send_pending(batch_size=10, max_attempts=2)
+
+    notification.refresh_from_db()
+    assert notification.status == Notification.Status.PENDING
+    assert notification.attempts == 1
+    assert notification.next_attempt > timezone.now()
+    assert notifications.send_pending(batch_size=10, max_attempts=2) == 0  # not due yet
+
+    Notification.objects.update(next_attempt=timezone.now())
+    notifications.send_pending(batch_size=10, max_attempts=2)
+
+    assert (
+        Notification.objects.get(id=notification.id).status
+        == Notification.Status.FAILED
+    )
+
+
+def test_unreachable_mail_server(qr: QR, monkeypatch):
+    notification = notifications.enqueue(qr)
+
+    def open_connection(self):
+        raise ConnectionRefusedError()
+
+    monkeypatch.setattr(locmem.EmailBackend, "open", open_connection)
+
+    assert notifications.send_pending(batch_size=10, max_attempts=3) == 1
+
+    notification.refresh_from_db()
+    assert notification.status == Notification.Status.PENDING
+    assert notification.attempts == 1
+    assert not mail.outbox
+
+
+def test_no_connection_when_all_cancelled(qr: QR, monkeypatch):
+    notifications.enqueue(qr)
+    utils.consume_qr(qr.uuid)
+
+    def get_connection():
+        raise AssertionError("connected to the mail server")
+
+    monkeypatch.setattr(notifications, "get_connection", get_connection)
+
+    assert notifications.send_pending(batch_size=10, max_attempts=3) == 1
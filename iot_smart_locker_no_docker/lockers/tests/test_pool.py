@@ -0,0 +1,103 @@
+import random
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from iot_smart_locker_no_docker.lockers import pool, utils
+from iot_smart_locker_no_docker.lockers.models import Locker
+
+
+class FakeRedis:
+    """The subset of redis-py used by the pool"""
+
+    def __init__(self):
+        self.sets = {}
+
+    def srandmember(self, key, count):
+        members = list(self.sets.get(key, ()))
+        return [
+            str(m).encode() for m in random.sample(members, min(count, len(members)))
+        ]
+
+    def sadd(self, key, *values):
+        self.sets.setdefault(key, set()).update(int(v) for v in values)
+
+    def srem(self, key, *values):
+        self.sets.get(key, set()).difference_update(int(v) for v in values)
+
+    def delete(self, key):
+        self.sets.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+    def members(self):
+        return self.sets.get(pool.FREE_LOCKERS_KEY, set())
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    fake = FakeRedis()
+    monkeypatch.setattr(pool, "_get_redis", lambda: fake)
+    return fake
+
+
+@pytest.mark.django_db
+def test_sample(redis: FakeRedis):
+    redis.sadd(pool.FREE_LOCKERS_KEY, 1, 2, 3)
+
+    assert sorted(pool.sample(5)) == [1, 2, 3]
+    assert len(pool.sample(2)) == 2
+    assert redis.members() == {1, 2, 3}
+
+
+@pytest.mark.django_db
+def test_rebuild(redis: FakeRedis):
+    redis.sadd(pool.FREE_LOCKERS_KEY, 99)
+    free = Locker.objects.create()
+    Locker.objects.create(occupied=True)
+
+    call_command("rebuild_locker_pool")
+
+    assert redis.members() == {free.id}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_allocation_takes_lockers_from_the_pool(redis: FakeRedis):
+    Locker.objects.create()
+    pooled = Locker.objects.create()
+    redis.sadd(pool.FREE_LOCKERS_KEY, pooled.id)
+
+    locker = utils.get_unoccupied_locker()
+
+    assert locker == pooled
+    assert locker.occupied
+    assert redis.members() == set()  # removed on commit
+
+
+@pytest.mark.django_db(transaction=True)
+def test_allocation_skips_stale_entries(redis: FakeRedis):
+    stale = Locker.objects.create(occupied=True)
+    free = Locker.objects.create()
+    redis.sadd(pool.FREE_LOCKERS_KEY, stale.id)
+
+    assert utils.get_unoccupied_locker() == free
+    assert stale.id not in redis.members()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_add_waits_for_commit(redis: FakeRedis):
+    locker = Locker.objects.create(occupied=True)
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            utils.free_locker(locker)
+            raise RuntimeError("rolled back")
+    assert redis.members() == set()
+
+    utils.free_locker(locker)
+    assert redis.members() == {locker.id}
@@ -0,0 +1,50 @@
+import pytest
+from django.template import Context, Template
+from django.urls import reverse
+
+from iot_smart_locker_no_docker.lockers.models import QR, Locker
+from iot_smart_locker_no_docker.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def qr(user: User) -> QR:
+    return QR.objects.create(recipient=user, locker=Locker.objects.create())
+
+
+@pytest.mark.parametrize(
+    "format,content_type", [("png", "image/png"), ("svg", "image/svg+xml")]
+)
+def test_qr_image(client, qr: QR, format: str, content_type: str):
+    response = client.get(reverse("lockers:qr_image", args=[qr.uuid, format]))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == content_type
+    assert "immutable" in response["Cache-Control"]
+    assert response["ETag"]
+
+
+def test_qr_image_not_modified(client, qr: QR, django_assert_num_queries):
+    url = reverse("lockers:qr_image", args=[qr.uuid, "png"]) + "?scale=4"
+    etag = client.get(url)["ETag"]
+
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+
+
+def test_qr_image_of_unknown_qr(client):
+    response = client.get(reverse("lockers:qr_image", args=["0" * 32, "png"]))
+
+    assert response.status_code == 404
+
+
+def test_qr_image_url_without_request(qr: QR):
+    url = Template("{% load lockers_extras %}{% qr_image_url qr %}").render(
+        Context({"qr": qr})
+    )
+
+    assert url.startswith("http")
+    assert url.endswith(reverse("lockers:qr_image", args=[qr.uuid, "png"]) + "?scale=6")
@@ -0,0 +1,59 @@
+import pytest
+from django.core.cache import cache
+
+from iot_smart_locker_no_docker.lockers import rendering, utils
+from iot_smart_locker_no_docker.lockers.models import QR, Locker
+from iot_smart_locker_no_docker.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Counts the actual renders"""
+    cache.clear()
+    rendered = []
+    render = rendering._render
+
+    def counting_render(qr, format, scale):
+        rendered.append((qr.uuid, format, scale))
+        return render(qr, format, scale)
+
+    monkeypatch.setattr(rendering, "_render", counting_render)
+    monkeypatch.setattr(rendering, "local", rendering.LRUCache(max_entries=2))
+    return rendered
+
+
+def test_render_is_cached(user: User, renders):
+    qr = QR.objects.create(recipient=user, locker=Locker.objects.create())
+
+    svg = rendering.render(qr, "svg_inline", 6)
+    assert svg.startswith(b"<svg")
+    assert rendering.render(qr, "svg_inline", 6) == svg
+    assert rendering.render(qr, "png", 6).startswith(b"\x89PNG")
+    assert len(renders) == 2
+
+    rendering.local = rendering.LRUCache(max_entries=2)  # another process
+    rendering.render(qr, "svg_inline", 6)
+    assert len(renders) == 2  # from the shared cache
+
+
+def test_render_is_forgotten_when_consumed(user: User, renders):
+    qr = QR.objects.create(recipient=user, locker=Locker.objects.create())
+    rendering.render(qr, "png", 4)
+
+    utils.consume_qr(qr.uuid)
+
+    assert rendering.local.get((qr.uuid, "png", 4)) is None
+    assert cache.get(rendering._shared_key((qr.uuid, "png", 4))) is None
+
+
+def test_lru_eviction():
+    lru = rendering.LRUCache(max_entries=2)
+    lru.set(("a", "png", 1), b"a")
+    lru.set(("b", "png", 1), b"b")
+    lru.get(("a", "png", 1))
+    lru.set(("c", "png", 1), b"c")
+
+    assert lru.get(("b", "png", 1)) is None
+    assert lru.get(("a", "png", 1)) == b"a"
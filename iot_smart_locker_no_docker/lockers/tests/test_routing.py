@@ -0,0 +1,32 @@
+import pytest
+
+from iot_smart_locker_no_docker.lockers import routing
+from iot_smart_locker_no_docker.lockers.models import Controller, Locker
+
+pytestmark = pytest.mark.django_db
+
+
+def test_default_route(settings):
+    locker = Locker.objects.create()
+
+    assert routing.table.get(locker.id) == routing.Route(
+        0, settings.LOCKERS_DEFAULT_CONTROLLER_URL, locker.id, False
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_route_reloads_on_change():
+    controller = Controller.objects.create(name="bank-a", url="http://10.0.0.2:80")
+    locker = Locker.objects.create(controller=controller, door=3)
+    assert routing.table.get(locker.id) == routing.Route(
+        controller.id, "http://10.0.0.2:80", 3, False
+    )
+
+    controller.url = "http://10.0.0.3:80"
+    controller.save()
+    locker.door = None
+    locker.save()
+
+    assert routing.table.get(locker.id) == routing.Route(
+        controller.id, "http://10.0.0.3:80", locker.id, False
+    )
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.urls import reverse
+
+from iot_smart_locker_no_docker.lockers import routing, telemetry
+from iot_smart_locker_no_docker.lockers.models import Locker, TelemetryEvent
+
+pytestmark = pytest.mark.django_db
+
+
+def test_parse_readings():
+    readings = telemetry.parse_readings("3 t 21.5 1618000000\n5 x 1\n5 q 1\nbogus\n")
+
+    assert len(readings) == 2
+    assert readings[0] == telemetry.Reading(
+        3,
+        TelemetryEvent.Kind.TEMPERATURE,
+        21.5,
+        datetime.fromtimestamp(1618000000, timezone.utc),
+    )
+    assert readings[1].kind == TelemetryEvent.Kind.TAMPER
+
+
+def test_report_telemetry(client, django_assert_max_num_queries):
+    lockers = [Locker.objects.create() for _ in range(3)]
+    body = "".join(
+        f"{locker.id} t 20.{i} 1618000000\n"
+        for i, locker in enumerate(lockers)
+        for _ in range(100)
+    )
+
+    with django_assert_max_num_queries(10):  # not one per reading
+        response = client.post(
+            reverse("lockers:report_telemetry", args=[routing.DEFAULT_CONTROLLER_ID]),
+            body,
+            content_type="text/plain",
+        )
+
+    assert response.status_code == 202
+    assert TelemetryEvent.objects.count() == 300
+
+
+def test_prune():
+    locker = Locker.objects.create()
+    now = datetime.now(timezone.utc)
+    telemetry.record_readings(
+        routing.DEFAULT_CONTROLLER_ID,
+        [
+            telemetry.Reading(
+                locker.id, TelemetryEvent.Kind.DOOR, 1, now - timedelta(days=100)
+            ),
+            telemetry.Reading(locker.id, TelemetryEvent.Kind.DOOR, 0, now),
+        ],
+    )
+
+    assert telemetry.prune(timedelta(days=90)) == 1
+    assert TelemetryEvent.objects.count() == 1
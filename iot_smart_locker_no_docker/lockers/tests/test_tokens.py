@@ -0,0 +1,61 @@
+import pytest
+import segno
+from django.urls import reverse
+
+from iot_smart_locker_no_docker.lockers import tokens
+from iot_smart_locker_no_docker.lockers.models import QR, Locker
+from iot_smart_locker_no_docker.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def qr(user: User) -> QR:
+    return QR.objects.create(
+        recipient=user, locker=Locker.objects.create(occupied=True)
+    )
+
+
+def test_read_uuid(qr: QR):
+    assert tokens.read_uuid(qr.to_token()) == qr.uuid
+
+
+def test_read_uuid_of_forged_token(qr: QR):
+    token: str = qr.to_token()
+    forged: str = token[:-1] + ("A" if token[-1] != "A" else "B")
+
+    assert tokens.read_uuid(forged) is None
+
+
+def test_read_uuid_of_expired_token(qr: QR, settings):
+    settings.LOCKERS_QR_TOKEN_MAX_AGE = -1
+
+    assert tokens.read_uuid(qr.to_token()) is None
+
+
+def test_read_unsigned_uuid(qr: QR, settings):
+    assert tokens.read_uuid(qr.uuid) == qr.uuid
+    assert tokens.read_uuid("not-a-uuid") is None
+
+    settings.LOCKERS_QR_ACCEPT_UNSIGNED = False
+    assert tokens.read_uuid(qr.uuid) is None
+
+
+def test_read_compact_code(qr: QR, settings):
+    settings.LOCKERS_QR_COMPACT_PAYLOADS = True
+    settings.LOCKERS_QR_ACCEPT_UNSIGNED = False
+
+    code: str = qr.get_payload()
+
+    assert len(code) == 26
+    assert segno.make(code, micro=False).mode == "alphanumeric"
+    assert tokens.read_uuid(code) == qr.uuid
+    assert tokens.read_uuid(qr.uuid) is None
+
+
+def test_collect_with_compact_code(client, qr: QR):
+    response = client.get(
+        reverse("lockers:collect_with_qr", args=[tokens.make_compact(qr.uuid)])
+    )
+
+    assert response.status_code == 200 + qr.locker_id
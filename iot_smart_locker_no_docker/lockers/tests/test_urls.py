@@ -7,3 +7,14 @@ pytestmark = pytest.mark.django_db
 def test_deposit():
     assert reverse("lockers:deposit") == "/lockers/deposit/"
     assert resolve("/lockers/deposit/").view_name == "lockers:deposit"
+
+
+def test_collect_with_personal_qr():
+    assert (
+        reverse("lockers:collect_with_personal_qr", kwargs={"uuid": "abc"})
+        == "/lockers/api/collect/personal_qr/abc"
+    )
+    assert (
+        resolve("/lockers/api/collect/personal_qr/abc").view_name
+        == "lockers:collect_with_personal_qr"
+    )
@@ -0,0 +1,47 @@
+import pytest
+
+from iot_smart_locker_no_docker.lockers import cache, utils
+from iot_smart_locker_no_docker.lockers.models import QR, Locker
+from iot_smart_locker_no_docker.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_get_unoccupied_locker_occupies_it():
+    first, second = Locker.objects.create(), Locker.objects.create()
+
+    assert utils.get_unoccupied_locker() == first
+    assert utils.get_unoccupied_locker() == second
+    assert utils.get_unoccupied_locker() is None
+    assert not Locker.objects.filter(occupied=False).exists()
+
+
+def test_find_locker_for_deposit_reuses_waiting_locker(user: User):
+    locker = Locker.objects.create(occupied=True)
+    qr = QR.objects.create(recipient=user, locker=locker)
+    Locker.objects.create()
+
+    assert utils.find_locker_for_deposit(user) == (locker, qr)
+
+
+def test_consume_qr(user: User):
+    locker = Locker.objects.create(occupied=True)
+    qr = QR.objects.create(recipient=user, locker=locker)
+    cache.forget_qrs([qr.uuid])  # should work with an empty cache as well
+
+    assert utils.consume_qr(qr.uuid) == locker.id
+    assert utils.consume_qr(qr.uuid) is None
+    assert not QR.objects.exists()
+    assert not Locker.objects.get(id=locker.id).occupied
+
+
+def test_consume_qrs_of(user: User):
+    first, second = Locker.objects.create(occupied=True), Locker.objects.create(
+        occupied=True
+    )
+    QR.objects.create(recipient=user, locker=first)
+    QR.objects.create(recipient=user, locker=second)
+
+    assert utils.consume_qrs_of(user.id) == [first.id, second.id]
+    assert utils.consume_qrs_of(user.id) == []
+    assert not Locker.objects.filter(occupied=True).exists()
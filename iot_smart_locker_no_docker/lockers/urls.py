@@ -2,13 +2,18 @@ from django.urls import path
 from django.views.generic import TemplateView
 
 from iot_smart_locker_no_docker.lockers.api.views import (
-    open_single_locker_with_nfc,
+    controller_heartbeat,
+    open_lockers_with_nfc,
+    open_lockers_with_personal_qr,
     open_single_locker_with_qr,
+    report_door_events,
+    report_telemetry,
     show_connection_error_page,
 )
 from iot_smart_locker_no_docker.lockers.views import (
     LockerDepositRequestView,
     LockerDepositSuccessView,
+    qr_image,
 )
 
 app_name = "lockers"
@@ -26,21 +31,37 @@ urlpatterns = [
         view=TemplateView.as_view(template_name="lockers/general_error.html"),
         name="deposit_failure",
     ),
+    path("qr/<str:uuid>.<str:format>", view=qr_image, name="qr_image"),
     # API patterns:
     path(
         "api/collect/qr/<str:uuid>",
         view=open_single_locker_with_qr,
         name="collect_with_qr",
     ),
-    # path(
-    #     "api/collect/personal_qr/",
-    #     view=OpenLockersWithPersonalQRView.as_view(),
-    #     name="collect_with_personal_qr",
-    # ),
+    path(
+        "api/collect/personal_qr/<str:uuid>",
+        view=open_lockers_with_personal_qr,
+        name="collect_with_personal_qr",
+    ),
     path(
         "api/collect/nfc/<str:serial>",
-        view=open_single_locker_with_nfc,
+        view=open_lockers_with_nfc,
         name="collect_with_nfc",
     ),
+    path(
+        "api/controllers/<int:controller_id>/heartbeat",
+        view=controller_heartbeat,
+        name="controller_heartbeat",
+    ),
+    path(
+        "api/controllers/<int:controller_id>/doors",
+        view=report_door_events,
+        name="report_door_events",
+    ),
+    path(
+        "api/controllers/<int:controller_id>/telemetry",
+        view=report_telemetry,
+        name="report_telemetry",
+    ),
     path("connection_error", view=show_connection_error_page, name="connection_error"),
 ]
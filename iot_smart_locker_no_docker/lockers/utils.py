@@ -1,23 +1,39 @@
 import logging
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from time import sleep
-from typing import Dict, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
-import requests
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import send_mail
+from django.db import connection, transaction
 from django.db.models import QuerySet
 from django.template import loader
 
-from iot_smart_locker_no_docker.lockers.models import QR, BaseQR, Locker, User
+from iot_smart_locker_no_docker.lockers import cache, hardware, liveness, pool, routing
+from iot_smart_locker_no_docker.lockers.circuit import CircuitBreaker
+from iot_smart_locker_no_docker.lockers.models import (
+    QR,
+    BaseQR,
+    Locker,
+    OpenCommand,
+    PersonalQR,
+    User,
+)
 
 logger = logging.getLogger("django")
 
+POOL_SAMPLE_SIZE = 5
+MAX_CONCURRENT_OPENS = 16
+
 
 def find_locker_for_deposit(recipient: User) -> Tuple[Locker, Union[QR, None]]:
     """There should only be one QR per user.
     If one exists, return its locker.
-    If one doesn't exist, allocate locker."""
+    If one doesn't exist, allocate locker (already marked as occupied)."""
     try:
         qr: QR = QR.objects.get(recipient=recipient)
     except ObjectDoesNotExist:
@@ -26,22 +42,126 @@ def find_locker_for_deposit(recipient: User) -> Tuple[Locker, Union[QR, None]]:
     return qr.locker, qr
 
 
-def get_unoccupied_locker() -> Locker:
-    available_lockers: QuerySet = Locker.objects.filter(occupied=False)
-    return available_lockers.first()
+def get_unoccupied_locker() -> Union[Locker, None]:
+    """Atomically allocates a free locker and marks it as occupied.
+    Lockers are taken from the free lockers pool when possible, and the table is only
+    scanned if the pool is empty or unavailable.
+    Rows locked by concurrent deposits are skipped instead of waited on,
+    so two requests never get the same locker and never queue behind each other.
+    Lockers of offline controllers are skipped, as they couldn't be opened."""
+    offline_controller_ids: Set[int] = liveness.offline_controller_ids(
+        routing.table.controller_ids()
+    )
+    with transaction.atomic():
+        available_lockers: QuerySet = Locker.objects.select_for_update(
+            skip_locked=True
+        ).filter(occupied=False)
+        if offline_controller_ids:
+            available_lockers = available_lockers.exclude(
+                controller_id__in=offline_controller_ids
+            )
+
+        locker: Locker = None
+        candidate_ids: List[int] = pool.sample(POOL_SAMPLE_SIZE)
+        if candidate_ids:
+            locker = available_lockers.filter(id__in=candidate_ids).first()
+            if locker is None:
+                # stale pool entries, occupied by other means
+                pool.remove(
+                    Locker.objects.filter(
+                        id__in=candidate_ids, occupied=True
+                    ).values_list("id", flat=True)
+                )
+
+        if locker is None:
+            locker = available_lockers.order_by("id").first()
+        if locker is not None:
+            occupy_locker(locker)
+    return locker
 
 
 def occupy_locker(locker: Locker) -> None:
     locker.occupied = True
-    locker.save()
+    locker.save(update_fields=["occupied"])
+    pool.remove([locker.id])
 
 
 def free_locker(locker: Locker) -> None:
     locker.occupied = False
-    locker.save()
+    locker.save(update_fields=["occupied"])
+    pool.add([locker.id])
+
+
+def free_lockers(locker_ids: Iterable[int]) -> None:
+    """Bulk version of free_locker(), in a single UPDATE"""
+    locker_ids = list(locker_ids)
+    Locker.objects.filter(id__in=locker_ids).update(occupied=False)
+    pool.add(locker_ids)
+
+
+def consume_qr(qr_uuid: str) -> Optional[int]:
+    """Deletes the QR and frees its locker. Returns the locker's id, or None if there's no such QR.
+    Consuming an already consumed QR does nothing, so scanning the same code twice is harmless.
+    """
+    consumed: List[Tuple[int, str, int]] = _consume_qrs("uuid = %s", [qr_uuid])
+    return consumed[0][0] if consumed else None
+
+
+def consume_qrs_of(recipient_id: int, limit: Optional[int] = None) -> List[int]:
+    """Like consume_qr(), for all of the recipient's waiting QRs at once (or the oldest ``limit`` of them).
+    Returns the ids of all the freed lockers (empty if nothing was waiting)."""
+    consumed: List[Tuple[int, str, int]] = _consume_qrs(
+        "recipient_id = %s", [recipient_id], limit
+    )
+    return sorted(locker_id for locker_id, _, _ in consumed)
+
+
+def consume_qrs_of_personal_qr(
+    personal_qr_uuid: str, limit: Optional[int] = None
+) -> List[int]:
+    """Like consume_qrs_of(), for the owner of the personal QR.
+    The owner is read from the cache, or else resolved by the same statement that deletes their QRs.
+    """
+    recipient_id: Optional[int] = cache.get_personal_qr_user_id(personal_qr_uuid)
+    if recipient_id is not None:
+        return consume_qrs_of(recipient_id, limit)
+
+    consumed: List[Tuple[int, str, int]] = _consume_qrs(
+        f"recipient_id = (SELECT recipient_id FROM {PersonalQR._meta.db_table} WHERE uuid = %s)",
+        [personal_qr_uuid],
+        limit,
+    )
+    if consumed:
+        cache.set_personal_qr_user_id(personal_qr_uuid, consumed[0][2])
+    return sorted(locker_id for locker_id, _, _ in consumed)
+
+
+def _consume_qrs(
+    where: str, params: List, limit: Optional[int] = None
+) -> List[Tuple[int, str, int]]:
+    if limit is not None:
+        where = f"id IN (SELECT id FROM {QR._meta.db_table} WHERE {where} ORDER BY id LIMIT %s)"
+        params = [*params, limit]
+    with transaction.atomic():
+        consumed: List[Tuple[int, str, int]] = _delete_qrs(where, params)
+        if consumed:
+            free_lockers(locker_id for locker_id, _, _ in consumed)
+    cache.forget_qrs(qr_uuid for _, qr_uuid, _ in consumed)
+    return consumed
 
 
-def send_qr_via_email(qr: BaseQR, target: str):
+def _delete_qrs(where: str, params: List) -> List[Tuple[int, str, int]]:
+    """Deletes matching QRs in a single statement, returning the (locker_id, uuid, recipient_id) of each deleted QR"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {QR._meta.db_table} WHERE {where} RETURNING locker_id, uuid, recipient_id",
+            params,
+        )
+        return cursor.fetchall()
+
+
+def send_qr_via_email(qr: BaseQR, target: str, connection=None):
+    """Pass an open connection (django.core.mail.get_connection()) to reuse it for several emails"""
     message: str = """
       Hi there! A package is waiting for you!
       Please come pick it up from Smart Locker.
@@ -57,6 +177,28 @@ def send_qr_via_email(qr: BaseQR, target: str):
         [target],
         html_message=html_message,
         fail_silently=False,
+        connection=connection,
+    )
+
+
+def send_qrs_via_email(qrs: List[BaseQR], target: str, connection=None):
+    """Like send_qr_via_email(), for several packages waiting for the same recipient"""
+    message: str = f"""
+      Hi there! {len(qrs)} packages are waiting for you!
+      Please come pick them up from Smart Locker.
+    """
+    html_message: str = loader.render_to_string(
+        "email/packages_are_waiting.html", context={"qrs": qrs}
+    )
+
+    send_mail(
+        f"{len(qrs)} packages are waiting for you",
+        message,
+        "smart-locker@iot.com",
+        [target],
+        html_message=html_message,
+        fail_silently=False,
+        connection=connection,
     )
 
 
@@ -69,32 +211,148 @@ def request_to_open_locker(locker: Locker):
         f"=== request_to_open_locker [{datetime.now().strftime('%d/%m/%Y %H:%M:%S')}] ==="
     )
 
-    hw_ip: str = "http://192.168.43.212"
-    url: str = f"{hw_ip}:80"
-    data: str = str(locker.id)
-    headers: Dict = {"content-type": "text/plain"}
+    if not request_to_open_lockers([locker]).get(locker.id):
+        raise ConnectionError()
+
+
+def request_to_open_lockers(lockers: Iterable[Locker]) -> Dict[int, bool]:
+    """Opens the lockers with a single batch request per controller.
+    Controllers are requested concurrently, so they don't wait for each other.
+    Returns whether each locker (by id) was opened successfully."""
+    routes: Dict[int, routing.Route] = routing.table.get_many(
+        locker.id for locker in lockers
+    )
+    if not routes:
+        return {}
+
+    lockers_by_controller: Dict[int, List[int]] = defaultdict(list)
+    for locker_id, route in routes.items():
+        lockers_by_controller[route.controller_id].append(locker_id)
+
+    def open_doors(locker_ids: List[int]) -> Dict[int, bool]:
+        return _open_doors({locker_id: routes[locker_id] for locker_id in locker_ids})
+
+    if len(lockers_by_controller) == 1:
+        return open_doors(next(iter(lockers_by_controller.values())))
+
+    results: Dict[int, bool] = {}
+    with ThreadPoolExecutor(
+        max_workers=min(len(lockers_by_controller), MAX_CONCURRENT_OPENS)
+    ) as executor:
+        for controller_results in executor.map(
+            open_doors, lockers_by_controller.values()
+        ):
+            results.update(controller_results)
+    return results
+
+
+def enqueue_open_command(
+    locker: Locker, release_on_failure: bool = False
+) -> OpenCommand:
+    """Asks the drain_open_commands worker to open the locker, once the current transaction commits"""
+    return OpenCommand.objects.create(
+        locker=locker, release_on_failure=release_on_failure
+    )
+
 
-    logger.info(f"Requesting with retry to open locker #{locker.id}")
-    retry(request_with_retry, data=data, headers=headers, url=url)
+def release_lockers(locker_ids: Iterable[int]) -> None:
+    """Drops the QRs waiting in the lockers and frees them,
+    e.g. when a locker couldn't be opened for its deposit"""
+    locker_ids = list(locker_ids)
+    with transaction.atomic():
+        consumed: List[Tuple[int, str, int]] = _delete_qrs(
+            f"locker_id IN ({', '.join(['%s'] * len(locker_ids))})", locker_ids
+        )
+        free_lockers(locker_ids)
+    cache.forget_qrs(qr_uuid for _, qr_uuid, _ in consumed)
 
 
-def retry(func, max_attempts: int = 10, delay: float = 0.25, **kwargs):
+def get_circuit(controller_id: int) -> CircuitBreaker:
+    return CircuitBreaker(f"controller-{controller_id}")
+
+
+def is_controller_available(controller_id: int) -> bool:
+    """Whether requests to the controller may go through, i.e. it's online and its circuit isn't open"""
+    return (
+        liveness.is_online(controller_id) and not get_circuit(controller_id).is_open()
+    )
+
+
+def _open_doors(routes: Dict[int, routing.Route]) -> Dict[int, bool]:
+    """Opens the doors of lockers that share a controller, in a single (retried) request
+    if the controller supports batches, or in a request per door otherwise"""
+    route: routing.Route = next(iter(routes.values()))
+    lockers_by_door: Dict[int, int] = {
+        locker_route.door: locker_id for locker_id, locker_route in routes.items()
+    }
+
+    if not is_controller_available(route.controller_id):
+        logger.warning(
+            f"Controller {route.url} is offline or its circuit is open, not opening lockers {list(routes)}"
+        )
+        return {locker_id: False for locker_id in routes}
+
+    if not route.supports_batches:
+        door_batches: List[List[int]] = [[door] for door in lockers_by_door]
+    else:
+        door_batches = [list(lockers_by_door)]
+
+    logger.info(
+        f"Requesting with retry to open lockers {list(routes)} (doors {list(lockers_by_door)} of {route.url})"
+    )
+    door_results: Dict[int, bool] = {}
+    circuit: CircuitBreaker = get_circuit(route.controller_id)
+    for doors in door_batches:
+        try:
+            door_results.update(
+                retry(
+                    hardware.client.open_doors,
+                    circuit=circuit,
+                    url=route.url,
+                    doors=doors,
+                )
+            )
+        except ConnectionError:
+            door_results.update({door: False for door in doors})
+    return {
+        locker_id: door_results.get(door, False)
+        for door, locker_id in lockers_by_door.items()
+    }
+
+
+def retry(func, max_attempts: int = None, circuit: CircuitBreaker = None, **kwargs):
+    """Calls func(**kwargs) until it succeeds and returns its result,
+    with exponential backoff and jitter between attempts.
+    If a circuit breaker is given, fails right away while it's open."""
+    max_attempts = max_attempts or settings.LOCKERS_HW_RETRY_ATTEMPTS
     for i in range(max_attempts):
+        if circuit is not None and not circuit.allow_request():
+            logger.warning(
+                f"Circuit {circuit.name} is open, not calling func {func.__name__}"
+            )
+            break
         try:
-            func(**kwargs)
+            result = func(**kwargs)
         except Exception as e:
             logger.warning(f"Attempt #{i+1} failed for func {func.__name__}")
             logger.warning(e.__repr__())
-            sleep(delay)
+            if circuit is not None:
+                circuit.record_failure()
+            if i + 1 < max_attempts:
+                sleep(get_backoff_delay(i))
         else:
-            return
+            if circuit is not None:
+                circuit.record_success()
+            return result
     logger.warning("All attempts failed!")
     raise ConnectionError()
 
 
-def request_with_retry(data, headers, url):
-    response: requests.Response = requests.post(url, f"prefix_{data}", headers=headers)
-    logger.info(f"response status code: {response.status_code}")
-    if response.status_code != 200:
-        logger.warning("Something failed in communications with HW")
-        logger.warning(response.__repr__())
+def get_backoff_delay(attempt: int) -> float:
+    """Full jitter: a random delay of up to base * 2^attempt (capped),
+    so workers retrying against the same controller don't do so in lockstep"""
+    cap: float = min(
+        settings.LOCKERS_HW_RETRY_MAX_DELAY,
+        settings.LOCKERS_HW_RETRY_BASE_DELAY * 2**attempt,
+    )
+    return random.uniform(0, cap)
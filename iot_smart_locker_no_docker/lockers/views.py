@@ -1,15 +1,20 @@
-from typing import Any, Dict
+import hashlib
+from typing import Any, Dict, Optional
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse, HttpResponseRedirect
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
 from django.views.generic import FormView, TemplateView
 
-from iot_smart_locker_no_docker.lockers import utils
+from iot_smart_locker_no_docker.lockers import notifications, rendering, tokens, utils
 from iot_smart_locker_no_docker.lockers.forms import LockerDepositForm
-from iot_smart_locker_no_docker.lockers.models import QR
+from iot_smart_locker_no_docker.lockers.models import QR, BaseQR, PersonalQR
 
 User = get_user_model()
 
@@ -37,21 +42,25 @@ class LockerDepositRequestView(LoginRequiredMixin, FormView):
             return HttpResponseRedirect(reverse_lazy(self.failure_url))
 
         if qr is None:  # user doesn't have a waiting locker
+            # the locker was already claimed (marked occupied) by find_locker_for_deposit
             qr: QR = QR(recipient=recipient_user, locker=locker)
 
         # open locker
-        try:
-            utils.request_to_open_locker(locker)
-        except ConnectionError:
-            return HttpResponseRedirect(reverse_lazy("lockers:connection_error"))
-
-        # notify recipient
-        utils.send_qr_via_email(qr, recipient_user.email)
-
-        # change locker status to occupied
-        utils.occupy_locker(locker)
-
-        qr.save()
+        if settings.LOCKERS_OPEN_COMMANDS_ASYNC:
+            # the worker releases the locker if it can't be opened
+            utils.enqueue_open_command(locker, release_on_failure=qr.pk is None)
+        else:
+            try:
+                utils.request_to_open_locker(locker)
+            except ConnectionError:
+                if qr.pk is None:  # release the locker we've just claimed
+                    utils.free_locker(locker)
+                return HttpResponseRedirect(reverse_lazy("lockers:connection_error"))
+
+        qr.save()  # (re)generates the QR's code
+
+        # notify recipient, in the background once the deposit is committed
+        notifications.enqueue(qr)
         # https://stackoverflow.com/questions/26483026/how-to-pass-context-data-in-success-url
         return HttpResponseRedirect(
             reverse_lazy(self.get_success_url(), kwargs={"qr_id": qr.id})
@@ -68,3 +77,45 @@ class LockerDepositSuccessView(LoginRequiredMixin, TemplateView):
         context["qr"] = QR.objects.get(id=context["qr_id"])
 
         return context
+
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+QR_IMAGE_MAX_AGE = 60 * 60 * 24 * 30  # a uuid's image never changes
+
+
+def _get_scale(request) -> int:
+    try:
+        scale = int(request.GET.get("scale", 6))
+    except ValueError:
+        raise Http404()
+    if not 1 <= scale <= rendering.MAX_SCALE:
+        raise Http404()
+    return scale
+
+
+def _qr_image_etag(request, uuid: str, format: str) -> Optional[str]:
+    """Computed without the database, so conditional requests are answered right away"""
+    key = f"{uuid}:{format}:{_get_scale(request)}:{tokens.payload_kind()}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+@transaction.non_atomic_requests  # read-only
+@require_GET
+@condition(etag_func=_qr_image_etag)
+def qr_image(request, uuid: str, format: str) -> HttpResponse:
+    """The QR code as a PNG or SVG image, from the rendered-QR cache"""
+    if format not in CONTENT_TYPES:
+        raise Http404()
+    qr: BaseQR = (
+        QR.objects.filter(uuid=uuid).first()
+        or PersonalQR.objects.filter(uuid=uuid).first()
+    )
+    if qr is None:
+        raise Http404()
+
+    response = HttpResponse(
+        rendering.render(qr, format, _get_scale(request)),
+        content_type=CONTENT_TYPES[format],
+    )
+    patch_cache_control(response, public=True, max_age=QR_IMAGE_MAX_AGE, immutable=True)
+    return response
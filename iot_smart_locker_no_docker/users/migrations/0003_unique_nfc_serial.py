@@ -0,0 +1,34 @@
+# Generated by Django 3.1.8 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+def empty_serials_to_null(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.filter(nfc_serial='').update(nfc_serial=None)
+
+
+def null_serials_to_empty(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.filter(nfc_serial=None).update(nfc_serial='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_nfc_serial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='nfc_serial',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.RunPython(empty_serials_to_null, null_serials_to_empty),
+        migrations.AlterField(
+            model_name='user',
+            name='nfc_serial',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -12,7 +12,13 @@ class User(AbstractUser):
     first_name = None  # type: ignore
     last_name = None  # type: ignore
 
-    nfc_serial = CharField(max_length=255, default="")
+    # NULL when the user has no NFC tag, so that unregistered users don't collide on the unique index
+    nfc_serial = CharField(max_length=255, null=True, blank=True, unique=True)
+
+    def save(self, *args, **kwargs):
+        if not self.nfc_serial:
+            self.nfc_serial = None
+        super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         """Get url for user's detail view.
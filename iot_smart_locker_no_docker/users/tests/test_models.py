@@ -1,9 +1,17 @@
 import pytest
 
 from iot_smart_locker_no_docker.users.models import User
+from iot_smart_locker_no_docker.users.tests.factories import UserFactory
 
 pytestmark = pytest.mark.django_db
 
 
 def test_user_get_absolute_url(user: User):
     assert user.get_absolute_url() == f"/users/{user.username}/"
+
+
+def test_users_without_nfc_serial_dont_collide(user: User):
+    other_user = UserFactory(nfc_serial="")
+
+    assert user.nfc_serial is None
+    assert other_user.nfc_serial is None